@@ -5,58 +5,35 @@ Post Edit Command - Edit existing clan recruitment posts
 import lightbulb
 import hikari
 import coc
-from datetime import datetime, timezone, UTC, timedelta
+from datetime import datetime, timezone, timedelta
 import re
-from utils.mongo import MongoClient
+import asyncio
+import logging
+from utils.mongo import MongoClient, ensure_utc_aware
 from utils.constants import CYAN_ACCENT
+from utils.recruitment_render import ClanSnapshot, render_recruitment_post
+from utils.session_store import SessionStore
+from utils.image_pipeline import ImageError
+from utils.interaction_router import router
+from utils import bot_data
 
 from hikari.impl import (
     ModalActionRowBuilder as ModalActionRow,
-    ContainerComponentBuilder as Container,
-    TextDisplayComponentBuilder as Text,
-    SeparatorComponentBuilder as Separator,
-    MediaGalleryComponentBuilder as Media,
-    MediaGalleryItemBuilder as MediaItem,
     MessageActionRowBuilder as ActionRow,
-    LinkButtonBuilder as LinkButton,
-    SectionComponentBuilder as Section,
-    ThumbnailComponentBuilder as Thumbnail,
     InteractiveButtonBuilder as Button,
 )
 
 loader = lightbulb.Loader()
 
-# Store modal handlers globally
-modal_handlers = {}
+logger = logging.getLogger(__name__)
+
+# In-progress edits, keyed by user ID (expire if the modal is abandoned)
+sessions = SessionStore("post_edit")
 
 # Configuration - should match post_clan.py
 RECRUITMENT_CHANNEL_ID = 1144471630614114454
 
 
-def ensure_utc_aware(dt):
-    """Ensure a datetime is timezone-aware in UTC"""
-    if dt is None:
-        return None
-    if dt.tzinfo is None:
-        # Naive datetime - assume it's UTC
-        return dt.replace(tzinfo=timezone.utc)
-    return dt
-
-
-@loader.listener(hikari.InteractionCreateEvent)
-async def on_interaction(event: hikari.InteractionCreateEvent) -> None:
-    """Handle modal and button interactions"""
-    interaction = event.interaction
-    
-    if isinstance(interaction, hikari.ModalInteraction):
-        if interaction.custom_id.startswith("edit_recruitment_modal_"):
-            await handle_edit_modal_interaction(interaction)
-    
-    elif isinstance(interaction, hikari.ComponentInteraction):
-        if interaction.custom_id.startswith("load_edit_data_"):
-            await handle_load_edit_data(interaction)
-
-
 @loader.command
 class PostEdit(
     lightbulb.SlashCommand,
@@ -68,15 +45,13 @@ class PostEdit(
     async def invoke(
         self,
         ctx: lightbulb.Context,
-        mongo: MongoClient = lightbulb.di.INJECTED,
-        bot: hikari.GatewayBot = lightbulb.di.INJECTED,
-        coc_client: coc.Client = lightbulb.di.INJECTED
+        mongo: MongoClient = lightbulb.di.INJECTED
     ) -> None:
         # Defer to prevent timeout during MongoDB query
         await ctx.defer(ephemeral=True)
         
         # Check if user has stored recruitment data
-        stored_data = await mongo.recruit_data.find_one({"_id": str(ctx.user.id)})
+        stored_data = await mongo.get_recruit_template(str(ctx.user.id))
         
         if not stored_data:
             embed = hikari.Embed(
@@ -89,15 +64,7 @@ class PostEdit(
         
         # Store context and data for modal handler
         channel_id = RECRUITMENT_CHANNEL_ID if RECRUITMENT_CHANNEL_ID else ctx.channel_id
-        modal_handlers[ctx.user.id] = {
-            "save": True,
-            "mongo": mongo,
-            "coc_client": coc_client,
-            "bot": bot,
-            "channel_id": channel_id,
-            "is_edit": True,
-            "stored_data": stored_data  # Store the data here
-        }
+        await sessions.put(ctx.user.id, save=True, stored_data=stored_data, channel_id=channel_id)
         
         # Show a button to load data
         embed = hikari.Embed(
@@ -134,13 +101,14 @@ class PostEdit(
         )
 
 
+@router.route("load_edit_data_")
 async def handle_load_edit_data(interaction: hikari.ComponentInteraction) -> None:
     """Handle button click to load edit data"""
     user_id = int(interaction.custom_id.split("_")[-1])
     
     # Get stored handler data
-    user_data = modal_handlers.get(user_id)
-    if not user_data:
+    session = await sessions.get(user_id)
+    if not session:
         await interaction.create_initial_response(
             hikari.ResponseType.MESSAGE_UPDATE,
             content="❌ Session expired. Please try the command again.",
@@ -149,7 +117,7 @@ async def handle_load_edit_data(interaction: hikari.ComponentInteraction) -> Non
         return
     
     # Get the stored data (already loaded in the command)
-    stored_data = user_data.get("stored_data")
+    stored_data = session.stored_data
     if not stored_data:
         await interaction.create_initial_response(
             hikari.ResponseType.MESSAGE_UPDATE,
@@ -210,8 +178,10 @@ async def show_edit_modal_from_interaction(interaction: hikari.ComponentInteract
         custom_id=f"edit_recruitment_modal_{interaction.user.id}",
         components=[clan_tag_input, recruitment_message_input, image_url_input, discord_link_input]
     )
+    router.record_ack(interaction)
 
 
+@router.route("edit_recruitment_modal_", hikari.ModalInteraction)
 async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) -> None:
     """Handle the edit modal submission"""
     # Extract user ID from custom_id first (before any async operations)
@@ -222,6 +192,7 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         hikari.ResponseType.DEFERRED_MESSAGE_CREATE,
         flags=hikari.MessageFlag.EPHEMERAL
     )
+    router.record_ack(interaction)
     
     # Helper to get modal values
     def get_val(custom_id: str) -> str:
@@ -232,23 +203,20 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         return ""
     
     # Get stored data
-    user_data = modal_handlers.get(user_id)
-    if not user_data:
+    session = await sessions.pop(user_id)
+    if not session:
         await interaction.edit_initial_response(
             content="❌ Session expired. Please try again."
         )
         return
     
-    mongo = user_data["mongo"]
-    coc_client = user_data["coc_client"]
-    bot = user_data["bot"]
-    channel_id = user_data["channel_id"]
+    mongo = bot_data.data["mongo"]
     
-    # Get stored data from modal handler (already loaded)
-    stored_data = user_data.get("stored_data")
+    # Get stored data from the session (already loaded)
+    stored_data = session.stored_data
     if not stored_data:
         # Double-check in database
-        stored_data = await mongo.recruit_data.find_one({"_id": str(interaction.user.id)})
+        stored_data = await mongo.get_recruit_template(str(interaction.user.id))
         if not stored_data:
             embed = hikari.Embed(
                 title="❌ No Saved Recruitment Post",
@@ -292,9 +260,9 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         await interaction.edit_initial_response(embed=embed)
         return
     
-    # Fetch clan data
+    # Fetch clan data (served from the clan cache when fresh)
     try:
-        clan = await coc_client.get_clan(clan_tag)
+        clan = await bot_data.data["clan_cache"].get_clan(clan_tag)
     except coc.NotFound:
         embed = hikari.Embed(
             title="Clan Not Found",
@@ -312,6 +280,22 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         await interaction.edit_initial_response(embed=embed)
         return
     
+    # Check the image before it costs a post, then shrink and re-host it so the post loads fast
+    if image_url:
+        try:
+            image_check = await bot_data.data["image_validator"].check(image_url)
+            if not image_check.ok:
+                raise ImageError(image_check.reason)
+            image_url = await bot_data.data["image_pipeline"].prepare(image_url)
+        except ImageError as e:
+            embed = hikari.Embed(
+                title="Invalid Image",
+                description=str(e),
+                color=0xFF0000
+            )
+            await interaction.edit_initial_response(embed=embed)
+            return
+    
     # Update stored data (preserve message_id and channel_id)
     try:
         save_data = {
@@ -335,6 +319,8 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
             save_data,
             upsert=True
         )
+        # Saving resets posted_at, keep the cooldown map in step
+        bot_data.data["cooldowns"].record(interaction.user.id, save_data["posted_at"])
     except Exception as e:
         embed = hikari.Embed(
             title="Save Failed",
@@ -344,9 +330,9 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         await interaction.edit_initial_response(embed=embed)
         return
     
-    # Update the existing message if we have the message ID
-    messages_updated = 0
-    if not stored_data.get("message_id") or not stored_data.get("channel_id"):
+    # Every live post of this clan - the saved post plus the latest auto-post of each matching schedule
+    targets = await find_user_posts(mongo, str(interaction.user.id), stored_data, clan_tag)
+    if not targets:
         # No message ID stored - likely created without save option
         info_embed = hikari.Embed(
             title="ℹ️ No Previous Post Found",
@@ -361,40 +347,35 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         await interaction.edit_initial_response(embed=info_embed)
         return
     
-    if stored_data.get("message_id") and stored_data.get("channel_id"):
-        try:
-            # Fetch the specific message
-            message = await bot.rest.fetch_message(
-                channel=stored_data["channel_id"],
-                message=stored_data["message_id"]
-            )
-            
-            # Update it with new content
-            await update_recruitment_message(
-                bot, message, clan, clan_tag_clean,
-                recruitment_message, image_url, discord_link,
-                interaction.user
-            )
-            messages_updated = 1
-            
-        except hikari.NotFoundError:
-            # Message was deleted
-            success_embed = hikari.Embed(
-                title="⚠️ Original Message Not Found",
-                description="Your original recruitment post was deleted. Data has been updated for next time you post.",
-                color=0xFFA500
-            )
-            await interaction.edit_initial_response(embed=success_embed)
-            return
-        except Exception as e:
-            print(f"Error updating message: {e}")
-            error_embed = hikari.Embed(
-                title="⚠️ Failed to Update Message",
-                description=f"Could not update the recruitment post: {str(e)}\n\nYour data has been saved for next time.",
-                color=0xFFA500
-            )
-            await interaction.edit_initial_response(embed=error_embed)
-            return
+    # Render once and edit every post directly by its stored IDs
+    components = render_recruitment_post(
+        clan=ClanSnapshot.from_clan(clan),
+        recruitment_message=recruitment_message,
+        image_url=image_url,
+        discord_link=discord_link,
+        posted_by_id=interaction.user.id,
+        edited=True
+    )
+    messages_updated, messages_gone, errors = await edit_recruitment_posts(targets, components)
+    
+    if messages_updated == 0 and errors:
+        error_embed = hikari.Embed(
+            title="⚠️ Failed to Update Message",
+            description=f"Could not update the recruitment post: {errors[0]}\n\nYour data has been saved for next time.",
+            color=0xFFA500
+        )
+        await interaction.edit_initial_response(embed=error_embed)
+        return
+    
+    if messages_updated == 0:
+        # Every post was deleted
+        success_embed = hikari.Embed(
+            title="⚠️ Original Message Not Found",
+            description="Your original recruitment post was deleted. Data has been updated for next time you post.",
+            color=0xFFA500
+        )
+        await interaction.edit_initial_response(embed=success_embed)
+        return
     
     # Send success response
     success_embed = hikari.Embed(
@@ -403,127 +384,59 @@ async def handle_edit_modal_interaction(interaction: hikari.ModalInteraction) ->
         color=0x2ECC71
     )
     
-    if messages_updated > 0:
-        success_embed.add_field(
-            name="Messages Updated",
-            value=f"Updated {messages_updated} existing recruitment post(s)",
-            inline=False
-        )
-    else:
+    success_embed.add_field(
+        name="Messages Updated",
+        value=f"Updated {messages_updated} existing recruitment post(s)",
+        inline=False
+    )
+    
+    if messages_gone or errors:
         success_embed.add_field(
-            name="No Messages Found",
-            value="No existing recruitment posts found to update. Use `/post-clan` to create a new one.",
+            name="Not Updated",
+            value=f"{messages_gone} post(s) were deleted, {len(errors)} failed to update",
             inline=False
         )
     
     await interaction.edit_initial_response(embed=success_embed)
-    
-    # Clean up
-    if user_id in modal_handlers:
-        del modal_handlers[user_id]
 
 
-async def update_recruitment_message(
-    bot: hikari.GatewayBot,
-    message: hikari.Message,
-    clan: coc.Clan,
-    clan_tag_clean: str,
-    recruitment_message: str,
-    image_url: str,
-    discord_link: str,
-    user: hikari.User
-) -> None:
-    """Update an existing recruitment message with new data"""
-    # Calculate capital hall level
-    if clan and clan.capital_districts:
-        peak = max(d.hall_level for d in clan.capital_districts)
-    else:
-        peak = 0
-    
-    # Use the clan's share link if available
-    clan_link = clan.share_link if hasattr(clan, 'share_link') and clan.share_link else f"https://link.clashofclans.com/en?action=OpenClanProfile&tag={clan_tag_clean}"
-    
-    # Build components (same as in post_clan)
-    components = []
+async def find_user_posts(mongo: MongoClient, discord_id: str, stored_data: dict, clan_tag: str) -> list:
+    """Collect (channel_id, message_id) of every live recruitment post of a user's clan"""
+    targets = []
     
-    # Create container
-    container = Container(
-        accent_color=CYAN_ACCENT,
-        components=[
-            # Title
-            Text(content=f"## ⚔️ **{clan.name} Recruitment**"),
-            Separator(divider=True),
-            
-            # Clan Basic Info Section with Badge
-            Section(
-                components=[
-                    Text(content=(
-                        f"📌 **Clan Tag:** `{clan.tag}`\n"
-                        f"🎖️ **Clan Level:** {clan.level}\n"
-                        f"⛰️ **Capital Hall:** Level {peak}\n"
-                        f"🏆 **Trophies:** {clan.points:,}\n"
-                        f"👥 **Members:** {clan.member_count}\n"
-                        f"🌐 **Location:** {clan.location.name if clan.location else 'International'}\n"
-                        f"🗣️ **Language:** {clan.chat_language.name if hasattr(clan, 'chat_language') and clan.chat_language else 'Unknown'}"
-                    ))
-                ],
-                accessory=Thumbnail(media=clan.badge.url) if hasattr(clan, 'badge') and clan.badge else None
-            ),
-            
-            Separator(divider=True),
-            
-            # Clan Stats
-            Text(content=(
-                f"## 📊 **War Information**\n"
-                f"• **War League:** {clan.war_league.name if clan.war_league else 'Unranked'}\n"
-                f"• **War Wins:** {clan.war_wins}\n"
-                f"• **War Frequency:** {clan.war_frequency if hasattr(clan, 'war_frequency') else 'Always'}\n"
-                f"• **Win Streak:** {clan.war_win_streak if hasattr(clan, 'war_win_streak') else 0}"
-            )),
-            
-            Separator(divider=True),
-            
-            # Recruitment Message
-            Text(content="## 📋 **About Our Clan**"),
-            Text(content=recruitment_message),
-        ]
-    )
-    
-    # Add image if provided
-    if image_url:
-        container.add_component(Separator(divider=True))
-        container.add_component(Media(items=[MediaItem(media=image_url)]))
-    
-    # Add buttons
-    button_row = ActionRow(components=[])
-    button_row.add_component(
-        LinkButton(
-            url=clan_link,
-            label="📱 Apply In-Game"
-        )
-    )
-    
-    if discord_link:
-        button_row.add_component(
-            LinkButton(
-                url=discord_link,
-                label="💬 Join Discord"
-            )
-        )
+    if stored_data.get("message_id") and stored_data.get("channel_id"):
+        targets.append((int(stored_data["channel_id"]), int(stored_data["message_id"])))
     
-    container.add_component(button_row)
-    container.add_component(Separator(divider=True))
+    # Latest auto-post of each schedule for this clan - schedules with their own clan_tag post a different clan
+    targets.extend(await mongo.get_last_auto_posts(discord_id, clan_tag))
     
-    # Add footer with updated timestamp
-    container.add_component(
-        Text(content=f"\n-# Posted by {user.mention} • <t:{int(datetime.now(UTC).timestamp())}:f> (edited)")
-    )
-    
-    components.append(container)
+    # Auto-posts also update recruit_data, so the same message can show up twice
+    return list(dict.fromkeys(targets))
+
+
+async def edit_recruitment_posts(targets: list, components: list) -> tuple:
+    """
+    Edit recruitment posts in place by their stored IDs
+
+    Returns:
+        (updated, gone, errors) - messages edited, messages that no longer exist,
+        and the errors from edits that failed for any other reason
+    """
+    message_queue = bot_data.data["message_queue"]
     
-    # Update the message
-    await bot.rest.edit_message(
-        channel=message.channel_id,
-        message=message.id,
-        components=components
-    )
\ No newline at end of file
+    async def edit(channel_id: int, message_id: int):
+        try:
+            await message_queue.edit_message(channel_id, message_id, components=components)
+            return "updated"
+        except hikari.NotFoundError:
+            # Message was deleted
+            return "gone"
+        except Exception as e:
+            logger.error(f"Error updating message {message_id}: {e}")
+            return e
+    
+    results = await asyncio.gather(*(edit(channel_id, message_id) for channel_id, message_id in targets))
+    updated = sum(1 for result in results if result == "updated")
+    gone = sum(1 for result in results if result == "gone")
+    errors = [result for result in results if isinstance(result, Exception)]
+    return updated, gone, errors
@@ -6,43 +6,138 @@ Automatically deletes messages in the recruitment channel that are not from the
 import lightbulb
 import hikari
 import logging
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import UpdateOne
+
+from utils import bot_data
+from utils.mongo import MongoClient
 
 loader = lightbulb.Loader()
 
 # Configuration
 RECRUITMENT_CHANNEL_ID = 1144471630614114454
 
+# bot_state document holding the newest message checked (by a sweep or live)
+SWEEP_STATE_ID = "recruitment_channel_sweep"
+# Messages fetched per history page
+SWEEP_PAGE_SIZE = 100
+# Most messages one sweep will look at
+SWEEP_MAX_MESSAGES = 2000
+
 # Logger for debugging
 logger = logging.getLogger(__name__)
 
+# The bot's user ID, cached once the bot has started
+bot_user_id: Optional[hikari.Snowflake] = None
+# Running sweep, so overlapping shard READY events don't start a second one
+sweep_task: Optional[asyncio.Task] = None
+# Whether the last sweep finished - until then live messages don't move the high-water mark,
+# or a sweep cut short would skip what was posted while the bot was away
+swept = False
+
+
+@loader.listener(hikari.StartedEvent)
+async def on_started(event: hikari.StartedEvent) -> None:
+    """Cache the bot's user ID"""
+    global bot_user_id
+    bot_user = event.app.get_me()
+    if bot_user:
+        bot_user_id = bot_user.id
+
+
+@loader.listener(hikari.ShardReadyEvent)
+async def on_shard_ready(event: hikari.ShardReadyEvent) -> None:
+    """Clean up messages posted while the bot was offline (startup) or disconnected (new session)"""
+    global bot_user_id, sweep_task, swept
+    bot_user_id = event.my_user.id
+    
+    if sweep_task and not sweep_task.done():
+        return
+    swept = False
+    sweep_task = asyncio.create_task(sweep_recruitment_channel(event.app.rest, bot_data.data["mongo"]))
+
 
 @loader.listener(hikari.MessageCreateEvent)
 async def on_message_create(event: hikari.MessageCreateEvent) -> None:
     """Auto-delete messages in recruitment channel that aren't from the bot"""
+    global bot_user_id
     
     # Check if message is in the recruitment channel
     if event.channel_id != RECRUITMENT_CHANNEL_ID:
         return
     
-    # Get the bot's user ID
-    bot_user = event.app.get_me()
-    if not bot_user:
-        return
+    # Get the bot's user ID (cached - only looked up if StartedEvent came before this extension loaded)
+    if bot_user_id is None:
+        bot_user = event.app.get_me()
+        if not bot_user:
+            return
+        bot_user_id = bot_user.id
+    
+    if swept:
+        # Seen live - the next sweep only has to look at what comes after it
+        bot_data.data["write_buffer"].add("bot_state", advance_high_water_mark(event.message_id))
     
     # Check if message is from the bot itself
-    if event.author_id == bot_user.id:
+    if event.author_id == bot_user_id:
         return
     
-    # Delete the message since it's not from the bot
+    # Delete the message since it's not from the bot - batched with any others arriving in the same window
+    bot_data.data["bulk_deleter"].add(event.channel_id, event.message_id)
+    logger.info(f"Queued message from {event.author_id} in recruitment channel for deletion")
+
+
+def advance_high_water_mark(message_id: hikari.Snowflake) -> UpdateOne:
+    """Move the sweep's high-water mark forward (never back) to a message"""
+    return UpdateOne(
+        {"_id": SWEEP_STATE_ID},
+        {"$max": {"last_message_id": int(message_id)}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+async def sweep_recruitment_channel(rest: hikari.api.RESTClient, mongo: MongoClient) -> None:
+    """Delete non-bot messages posted after the high-water mark"""
+    global swept
+    bulk_deleter = bot_data.data["bulk_deleter"]
+    
     try:
-        await event.app.rest.delete_message(
-            channel=event.channel_id,
-            message=event.message_id
-        )
-        logger.info(f"Deleted message from {event.author_id} in recruitment channel")
-    except hikari.ForbiddenError:
-        logger.error(f"No permission to delete message {event.message_id}")
-    except hikari.NotFoundError:
-        logger.error(f"Message {event.message_id} already deleted")
+        state = await mongo.bot_state.find_one({"_id": SWEEP_STATE_ID}, {"last_message_id": 1})
+        after = state.get("last_message_id") if state else None
+        if after is None:
+            # First sweep - stop at the info message, the last thing the bot knows it posted
+            info_message = await mongo.get_info_message()
+            if info_message and info_message[0] == RECRUITMENT_CHANNEL_ID:
+                after = info_message[1]
+        
+        # Newest first, back to the mark - if there's more than the cap, the oldest are the ones left over
+        history = rest.fetch_messages(RECRUITMENT_CHANNEL_ID)
+        # Nothing to go on - only check the latest page instead of the whole history
+        limit = SWEEP_MAX_MESSAGES if after is not None else SWEEP_PAGE_SIZE
+        
+        checked = 0
+        deleted = 0
+        newest = None
+        async for message in history.limit(limit):
+            if after is not None and message.id <= after:
+                break
+            if newest is None:
+                newest = message.id
+            if message.author.id != bot_user_id:
+                bulk_deleter.add(RECRUITMENT_CHANNEL_ID, message.id)
+                deleted += 1
+            checked += 1
+        
+        if newest is not None:
+            # Only once the whole range is done, so an interrupted sweep starts over from the old mark
+            await mongo.bot_state.bulk_write([advance_high_water_mark(newest)])
+        swept = True
+        
+        if checked >= SWEEP_MAX_MESSAGES:
+            logger.warning(f"Recruitment channel sweep stopped after {checked} messages, older ones were skipped")
+        logger.info(f"Recruitment channel sweep checked {checked} message(s), {deleted} queued for deletion")
+        
     except Exception as e:
-        logger.error(f"Error deleting message {event.message_id}: {e}")
\ No newline at end of file
+        logger.error(f"Error sweeping recruitment channel: {e}")
@@ -5,27 +5,45 @@ Auto Recruitment Scheduler - Automatically posts recruitment messages at schedul
 import lightbulb
 import hikari
 import coc
+import os
 from datetime import datetime, timezone, time
+from typing import List, Optional, Set, Tuple
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.triggers.cron import CronTrigger
-from utils.mongo import MongoClient
-from utils.constants import CYAN_ACCENT, GREEN_ACCENT
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED, JobExecutionEvent, JobSubmissionEvent
+from utils.mongo import DATABASE_NAME, MongoClient
+from utils.message_queue import MessageQueue
+from utils.clan_cache import ClanCache
+from utils.image_validator import ImageValidator
+from utils.recruitment_render import ClanSnapshot, render_recruitment_post
 from utils import bot_data
+from utils.metrics import ERRORS_TOTAL, SCHEDULER_LAG_SECONDS, metrics
+from extensions.scheduler.reconcile import (
+    ScheduleReconciler,
+    RECONCILE_PROJECTION,
+    schedule_fingerprint,
+    DEFAULT_POST_TIME,
+    DEFAULT_TIMEZONE,
+)
+from extensions.scheduler.dispatcher import PostDispatcher
+from extensions.scheduler.jobstore import CachedMongoJobStore
+from extensions.scheduler.timer_wheel import TimerWheel
+from extensions.scheduler.leader import INSTANCE_ID, LeaderLease
+from extensions.scheduler.misfires import (
+    CATCH_UP_MAX_AGE,
+    CATCH_UP_POLICY,
+    MISFIRE_GRACE_SECONDS,
+    SchedulerEventLog,
+    find_missed_posts,
+    plan_catch_up,
+)
 import pendulum
 import logging
-from bson import ObjectId
-
-from hikari.impl import (
-    ContainerComponentBuilder as Container,
-    TextDisplayComponentBuilder as Text,
-    SeparatorComponentBuilder as Separator,
-    MediaGalleryComponentBuilder as Media,
-    MediaGalleryItemBuilder as MediaItem,
-    MessageActionRowBuilder as ActionRow,
-    LinkButtonBuilder as LinkButton,
-    SectionComponentBuilder as Section,
-    ThumbnailComponentBuilder as Thumbnail,
-)
+import asyncio
+from bson import ObjectId, Timestamp
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 
 loader = lightbulb.Loader()
 
@@ -38,157 +56,442 @@ logger = logging.getLogger(__name__)
 # Global scheduler instance
 scheduler = None
 
+# Background task that keeps jobs in sync with MongoDB
+sync_task = None
+
+# Tracks job fingerprints so only changed documents touch the scheduler
+reconciler = None
+
+# Batches jobs that fire in the same minute
+dispatcher = None
+
+# Persistent store for auto-post jobs, drained when scheduling stops
+jobstore = None
+
+# Records job firings and misses in scheduler_events
+event_log = None
+
+# Daily posts engine: "apscheduler" (one job per document) or "wheel" (timer wheel)
+SCHEDULER_ENGINE = os.getenv("AUTO_POST_ENGINE", "apscheduler").lower()
+
+# Timer wheel holding every document when SCHEDULER_ENGINE is "wheel"
+wheel = None
+
+# Leader election - only the instance holding the lease runs the scheduler
+lease = None
+
+# How long a post stays claimed by the instance posting it
+POST_CLAIM_SECONDS = 600
+
+# Job store keeping auto-post jobs (and their next run times) across restarts
+PERSISTENT_JOBSTORE = "mongo"
+JOBSTORE_COLLECTION = "scheduler_jobs"
+
+# How often the scheduler lag summary on /metrics is recomputed
+LAG_SUMMARY_INTERVAL_MINUTES = 5
+
+# Change stream configuration
+CHANGE_STREAM_STATE_ID = "auto_recruit_change_stream"
+POLL_INTERVAL_MINUTES = 5
+CHANGE_STREAM_RETRY_SECONDS = 10
+
+# Server error codes meaning change streams can't be used (standalone server, old version)
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573, 40324}
+# Server error codes meaning the resume token is no longer usable
+CHANGE_STREAM_HISTORY_LOST_CODES = {280, 286}
+
+# Maximum concurrent clan lookups while posting a batch
+CLAN_FETCH_CONCURRENCY = 5
+
 
 @loader.listener(hikari.StartedEvent)
 async def on_started(event: hikari.StartedEvent) -> None:
-    """Initialize the scheduler when bot starts"""
-    global scheduler
+    """Campaign for the scheduler lease - the scheduler starts once this instance holds it"""
+    global lease
+    bot = event.app
+    lease = LeaderLease(
+        bot_data.data["mongo"],
+        on_elected=lambda: start_scheduling(bot),
+        on_demoted=stop_scheduling
+    )
+    lease.start()
+
+
+@loader.listener(hikari.StoppingEvent)
+async def on_stopping(event: hikari.StoppingEvent) -> None:
+    """Shutdown the scheduler and hand the lease to another instance when bot stops"""
+    if lease:
+        await lease.stop()
+    await stop_scheduling()
+
+
+async def start_scheduling(bot: hikari.GatewayBot) -> None:
+    """Initialize the scheduler (this instance holds the lease)"""
+    global scheduler, sync_task, reconciler, dispatcher, event_log, wheel, jobstore
     
     # Get dependencies
-    bot = event.app
     mongo = bot_data.data["mongo"]
     coc_client = bot_data.data["coc_client"]
     
-    # Create scheduler
-    scheduler = AsyncIOScheduler(timezone="UTC")
-    
-    # Load existing scheduled posts
-    await load_scheduled_posts(bot, mongo, coc_client)
-    
-    # Schedule periodic reload of schedules from MongoDB (every 5 minutes)
+    # Create scheduler - auto-post jobs are persisted to MongoDB, housekeeping jobs only live in memory.
+    # The persistent store answers from memory and writes on its own thread, so it never blocks the loop
+    jobstore = CachedMongoJobStore(os.getenv("MONGODB_URI"), DATABASE_NAME, JOBSTORE_COLLECTION)
+    await jobstore.load()
+    scheduler = AsyncIOScheduler(
+        timezone="UTC",
+        jobstores={
+            "default": MemoryJobStore(),
+            PERSISTENT_JOBSTORE: jobstore,
+        }
+    )
+    scheduler.add_listener(record_job_lag, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(on_job_missed, EVENT_JOB_MISSED)
+    event_log = SchedulerEventLog(mongo, bot_data.data["write_buffer"])
+    metrics.register_stats("scheduler_lag", event_log.stats)
     scheduler.add_job(
-        func=reload_schedules_from_db,
+        func=event_log.refresh_summary,
         trigger='interval',
-        minutes=5,
-        args=[bot, mongo, coc_client],
-        id='reload_schedules',
+        minutes=LAG_SUMMARY_INTERVAL_MINUTES,
+        id='refresh_lag_summary',
         replace_existing=True,
+        next_run_time=datetime.now(timezone.utc),
         misfire_grace_time=60
     )
+    reconciler = ScheduleReconciler(
+        schedule=schedule_document,
+        unschedule=unschedule_recruitment_post
+    )
+    dispatcher = PostDispatcher(
+        post_batch=lambda entries: post_recruitment_batch(bot, mongo, coc_client, entries)
+    )
+    if SCHEDULER_ENGINE == "wheel":
+        wheel = TimerWheel(fire=lambda scheduled_at, entries: fire_wheel_minute(bot, mongo, coc_client, scheduled_at, entries))
+        metrics.register_stats("timer_wheel", wheel.stats)
+    
+    # Start paused so restored jobs don't fire before they've been reconciled
+    scheduler.start(paused=True)
+    restored, overdue = restore_persisted_jobs(keep=wheel is None)
+    
+    # Apply what changed while the bot was down, then deal with the runs it missed.
+    # Changes made from here on are picked up by the change stream, even those made during the load
+    start_at = await mongo.get_cluster_time()
+    await load_scheduled_posts(bot, mongo, coc_client)
+    await catch_up_missed_posts(mongo, restored, overdue)
+    
+    scheduler.resume()
+    if wheel:
+        wheel.start()
     
-    # Start scheduler
-    scheduler.start()
-    logger.info("Auto-recruitment scheduler started with MongoDB polling enabled")
+    # Apply changes from MongoDB as they happen (falls back to polling if unsupported)
+    sync_task = asyncio.create_task(watch_schedule_changes(bot, mongo, coc_client, start_at))
+    logger.info("Auto-recruitment scheduler started")
 
 
-@loader.listener(hikari.StoppingEvent)
-async def on_stopping(event: hikari.StoppingEvent) -> None:
-    """Shutdown the scheduler when bot stops"""
-    global scheduler
+async def stop_scheduling() -> None:
+    """Shutdown the scheduler (lease lost or bot stopping)"""
+    global sync_task, wheel, jobstore
+    if sync_task and not sync_task.done():
+        sync_task.cancel()
+        sync_task = None
+    if wheel:
+        await wheel.stop()
+        wheel = None
     if scheduler and scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("Auto-recruitment scheduler stopped")
+    if jobstore:
+        # Let queued job writes finish off the loop, so a re-election reads them back
+        await jobstore.close()
+        jobstore = None
+    if dispatcher:
+        # Let batches that were already collecting go out
+        await dispatcher.stop()
+
+
+def record_job_lag(event: JobSubmissionEvent) -> None:
+    """Record how late an auto-post job fired compared to when it was scheduled"""
+    if not event.job_id.startswith(("auto_recruit_", "catch_up_")):
+        # Housekeeping jobs (reload_schedules) aren't posts
+        return
+    job = scheduler.get_job(event.job_id)
+    grace = job.misfire_grace_time if job else None
+    
+    now = datetime.now(timezone.utc)
+    for scheduled_at in event.scheduled_run_times:
+        lag = max((now - scheduled_at).total_seconds(), 0.0)
+        if grace is not None and lag > grace:
+            # The executor drops this run and reports it through on_job_missed instead
+            continue
+        SCHEDULER_LAG_SECONDS.observe(lag)
+        event_log.record_fired(event.job_id, scheduled_at, now)
+
+
+def on_job_missed(event: JobExecutionEvent) -> None:
+    """A run was later than the misfire grace time and dropped by APScheduler - apply the catch-up policy"""
+    if not event.job_id.startswith("auto_recruit_"):
+        return
+    job = scheduler.get_job(event.job_id)
+    if not job:
+        return
+    doc_id, discord_id = job.args
+    logger.warning(f"Missed recruitment post for document {doc_id} due at {event.scheduled_run_time}")
+    schedule_catch_up([(doc_id, discord_id, event.scheduled_run_time)])
+
+
+def restore_persisted_jobs(keep: bool = True) -> Tuple[Set[str], List[tuple]]:
+    """
+    Seed the reconciler from the jobs kept in the job store
+    
+    Args:
+        keep: False to drop the stored auto-post jobs instead (timer wheel engine),
+            still reporting which runs they missed
+    
+    Returns:
+        Document IDs that had a job, and (doc_id, discord_id, missed_at) for every
+        job whose next run passed while the bot was down. Those jobs are moved on
+        to their next run so they don't all fire at once on resume.
+    """
+    now = datetime.now(timezone.utc)
+    fingerprints = {}
+    overdue = {}
+    
+    for job in scheduler.get_jobs(jobstore=PERSISTENT_JOBSTORE):
+        doc_id, discord_id = job.args
+        if job.id.startswith("auto_recruit_"):
+            fingerprints[doc_id] = job.name
+        
+        if job.next_run_time and job.next_run_time < now:
+            overdue.setdefault(doc_id, (doc_id, discord_id, job.next_run_time))
+            if job.id.startswith("catch_up_"):
+                job.remove()
+            elif keep:
+                job.modify(next_run_time=job.trigger.get_next_fire_time(None, now))
+        
+        if not keep and job.id.startswith("auto_recruit_"):
+            # Switched to the timer wheel - a leftover job would post a second time
+            job.remove()
+    
+    if keep:
+        reconciler.restore(fingerprints)
+    logger.info(f"Restored {len(fingerprints)} scheduled recruitment posts, {len(overdue)} overdue")
+    return set(fingerprints), list(overdue.values())
+
+
+async def catch_up_missed_posts(mongo: MongoClient, restored: Set[str], overdue: List[tuple]) -> None:
+    """Apply the catch-up policy to runs missed while the bot was offline"""
+    try:
+        now = datetime.now(timezone.utc)
+        # Restored jobs know exactly which run they missed - skip ones disabled or deleted since
+        missed = [
+            entry for entry in overdue
+            if entry[0] in reconciler.index and now - entry[2] <= CATCH_UP_MAX_AGE
+        ]
+        
+        # Documents without a stored job (first start, or added while offline) - work it out from last_posted
+        if set(reconciler.index) - restored:
+            posts = await mongo.get_schedules({**RECONCILE_PROJECTION, "last_posted": 1}, enabled_only=True)
+            missed.extend(
+                (str(post_data["_id"]), post_data["discord_id"], fire_time)
+                for post_data, fire_time in find_missed_posts(
+                    [post_data for post_data in posts if str(post_data["_id"]) not in restored],
+                    now
+                )
+            )
+        
+        if missed:
+            schedule_catch_up(missed)
+    except Exception as e:
+        logger.error(f"Error catching up on missed posts: {e}")
+
+
+def schedule_catch_up(entries: list) -> None:
+    """Schedule catch-up runs for (doc_id, discord_id, missed_at) entries according to the catch-up policy"""
+    run_times = plan_catch_up(len(entries), datetime.now(timezone.utc))
+    action = CATCH_UP_POLICY if run_times else "skip"
+    
+    for index, (doc_id, discord_id, missed_at) in enumerate(entries):
+        event_log.record_missed(f"auto_recruit_{doc_id}", doc_id, missed_at, action)
+        if run_times:
+            scheduler.add_job(
+                func=post_recruitment,
+                trigger="date",
+                run_date=run_times[index],
+                args=[doc_id, discord_id],
+                id=f"catch_up_{doc_id}",
+                jobstore=PERSISTENT_JOBSTORE,
+                replace_existing=True,
+                misfire_grace_time=None
+            )
+    
+    logger.info(f"{len(entries)} missed recruitment post(s), catch-up policy: {action}")
 
 
 async def load_scheduled_posts(bot: hikari.GatewayBot, mongo: MongoClient, coc_client: coc.Client) -> None:
     """Load all enabled auto-recruitment posts from database"""
     try:
         # Find all enabled auto-posts
-        cursor = mongo.auto_recruit.find({"enabled": True})
-        auto_posts = await cursor.to_list(None)
+        auto_posts = await mongo.get_schedules(RECONCILE_PROJECTION, enabled_only=True)
         
-        for post_data in auto_posts:
-            # Schedule the post using document _id as job identifier
-            schedule_recruitment_post(
-                bot=bot,
-                mongo=mongo,
-                coc_client=coc_client,
-                doc_id=str(post_data["_id"]),  # MongoDB document ID
-                discord_id=post_data["discord_id"],  # Discord user ID
-                post_time=post_data["post_time"],
-                timezone_str=post_data.get("timezone", "America/New_York")
-            )
-            
-        logger.info(f"Loaded {len(auto_posts)} scheduled recruitment posts")
+        result = reconciler.reconcile(auto_posts)
+        logger.info(f"Loaded {result.added} scheduled recruitment posts")
         
     except Exception as e:
         logger.error(f"Error loading scheduled posts: {e}")
 
 
-async def reload_schedules_from_db(bot: hikari.GatewayBot, mongo: MongoClient, coc_client: coc.Client) -> None:
-    """Reload schedules from MongoDB - called periodically to pick up changes"""
-    global scheduler
+async def watch_schedule_changes(
+    bot: hikari.GatewayBot,
+    mongo: MongoClient,
+    coc_client: coc.Client,
+    start_at: Optional[Timestamp] = None
+) -> None:
+    """
+    Apply auto_recruit inserts, updates and deletes as they happen using a change stream
+
+    Args:
+        start_at: Cluster time the schedules were loaded at - used when there's no resume token,
+                  so changes made during the load aren't missed
+    """
+    # Resume from where the last run stopped so edits made while offline are replayed
+    state = await mongo.bot_state.find_one({"_id": CHANGE_STREAM_STATE_ID})
+    resume_token = state.get("resume_token") if state else None
     
+    while True:
+        try:
+            async with await mongo.auto_recruit.watch(
+                full_document="updateLookup",
+                resume_after=resume_token,
+                start_at_operation_time=None if resume_token else start_at
+            ) as stream:
+                logger.info("Watching auto_recruit change stream")
+                async for change in stream:
+                    if change["operationType"] == "invalidate":
+                        # Collection was dropped or renamed - the stream can't be resumed
+                        resume_token = None
+                        await save_resume_token(mongo, None)
+                        start_at = await mongo.get_cluster_time()
+                        await reload_schedules_from_db(bot, mongo, coc_client)
+                        break
+                    
+                    await apply_schedule_change(bot, mongo, coc_client, change)
+                    resume_token = stream.resume_token
+                    await save_resume_token(mongo, resume_token)
+        
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                logger.warning(f"Change streams unavailable ({e}), falling back to polling every {POLL_INTERVAL_MINUTES} minutes")
+                start_polling(bot, mongo, coc_client)
+                return
+            if e.code in CHANGE_STREAM_HISTORY_LOST_CODES:
+                # Oplog rolled past our token - start fresh and resync everything once
+                logger.warning("Change stream resume token expired, resyncing all schedules")
+                resume_token = None
+                await save_resume_token(mongo, None)
+                start_at = await mongo.get_cluster_time()
+                await reload_schedules_from_db(bot, mongo, coc_client)
+                continue
+            logger.error(f"Change stream error: {e}")
+            await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+        except Exception as e:
+            logger.error(f"Change stream error: {e}")
+            await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+
+async def save_resume_token(mongo: MongoClient, resume_token) -> None:
+    """Persist the change stream resume token so restarts pick up where they left off"""
+    await mongo.bot_state.update_one(
+        {"_id": CHANGE_STREAM_STATE_ID},
+        {"$set": {"resume_token": resume_token, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+async def apply_schedule_change(bot: hikari.GatewayBot, mongo: MongoClient, coc_client: coc.Client, change: dict) -> None:
+    """Apply a single change stream event to the scheduler"""
+    operation = change["operationType"]
+    doc_id = str(change["documentKey"]["_id"])
+    
+    if operation in ("insert", "update", "replace"):
+        post_data = change.get("fullDocument")
+        if post_data is None:
+            # Document was deleted before the lookup ran
+            reconciler.remove(doc_id)
+        else:
+            action = reconciler.apply(post_data)
+            if action != "unchanged":
+                logger.info(f"Schedule for document {doc_id} {action}")
+    elif operation == "delete":
+        reconciler.remove(doc_id)
+
+
+def start_polling(bot: hikari.GatewayBot, mongo: MongoClient, coc_client: coc.Client) -> None:
+    """Schedule periodic diff-based reload of schedules from MongoDB"""
+    scheduler.add_job(
+        func=reload_schedules_from_db,
+        trigger='interval',
+        minutes=POLL_INTERVAL_MINUTES,
+        args=[bot, mongo, coc_client],
+        id='reload_schedules',
+        replace_existing=True,
+        misfire_grace_time=60
+    )
+
+
+async def reload_schedules_from_db(bot: hikari.GatewayBot, mongo: MongoClient, coc_client: coc.Client) -> None:
+    """Reload schedules from MongoDB - only jobs whose fingerprint changed are touched"""
     try:
         logger.info("Reloading schedules from MongoDB...")
         
-        # Get all current jobs
-        current_jobs = {job.id: job for job in scheduler.get_jobs() if job.id.startswith("auto_recruit_")}
-        
-        # Find all auto-posts in database (both enabled and disabled)
-        cursor = mongo.auto_recruit.find({})
-        all_posts = await cursor.to_list(None)
-        
-        # Track which jobs we've seen
-        seen_jobs = set()
-        
-        for post_data in all_posts:
-            doc_id = str(post_data["_id"])  # MongoDB document ID
-            discord_id = post_data.get("discord_id")  # Discord user ID
-            job_id = f"auto_recruit_{doc_id}"
-            seen_jobs.add(job_id)
-            
-            if not discord_id:
-                logger.warning(f"Document {doc_id} missing discord_id field")
-                continue
-            
-            if post_data.get("enabled", False):
-                # Should be scheduled
-                if job_id in current_jobs:
-                    # Always reschedule to ensure any changes are picked up
-                    post_time = post_data.get("post_time", "14:00")
-                    timezone_str = post_data.get("timezone", "America/New_York")
-                    
-                    logger.info(f"Updating schedule for document {doc_id} (Discord user {discord_id})")
-                    schedule_recruitment_post(
-                        bot=bot,
-                        mongo=mongo,
-                        coc_client=coc_client,
-                        doc_id=doc_id,
-                        discord_id=discord_id,
-                        post_time=post_time,
-                        timezone_str=timezone_str
-                    )
-                else:
-                    # New job - schedule it
-                    logger.info(f"Scheduling new job for document {doc_id} (Discord user {discord_id})")
-                    schedule_recruitment_post(
-                        bot=bot,
-                        mongo=mongo,
-                        coc_client=coc_client,
-                        doc_id=doc_id,
-                        discord_id=discord_id,
-                        post_time=post_data.get("post_time", "14:00"),
-                        timezone_str=post_data.get("timezone", "America/New_York")
-                    )
-            else:
-                # Should not be scheduled
-                if job_id in current_jobs:
-                    logger.info(f"Removing disabled job for document {doc_id}")
-                    scheduler.remove_job(job_id)
+        # Find all auto-posts in database (both enabled and disabled), scheduling fields only
+        all_posts = await mongo.get_schedules(RECONCILE_PROJECTION)
         
-        # Remove jobs that no longer exist in database
-        for job_id in current_jobs:
-            if job_id not in seen_jobs and job_id != 'reload_schedules':
-                logger.info(f"Removing orphaned job {job_id}")
-                scheduler.remove_job(job_id)
-                
-        logger.info("Schedule reload complete")
+        result = reconciler.reconcile(all_posts)
+        logger.info(f"Schedule reload complete: {result}")
         
     except Exception as e:
         logger.error(f"Error reloading schedules: {e}")
 
 
+def schedule_document(post_data: dict) -> bool:
+    """Schedule the job for one auto_recruit document"""
+    if wheel:
+        return wheel.schedule(
+            str(post_data["_id"]),
+            post_data["discord_id"],
+            post_data.get("post_time", DEFAULT_POST_TIME),
+            post_data.get("timezone", DEFAULT_TIMEZONE)
+        )
+    return schedule_recruitment_post(
+        doc_id=str(post_data["_id"]),  # MongoDB document ID
+        discord_id=post_data["discord_id"],  # Discord user ID
+        post_time=post_data.get("post_time", DEFAULT_POST_TIME),
+        timezone_str=post_data.get("timezone", DEFAULT_TIMEZONE),
+        fingerprint=schedule_fingerprint(post_data)
+    )
+
+
+def unschedule_recruitment_post(doc_id: str) -> bool:
+    """Remove the job for a document, returns True if a job was removed"""
+    if wheel:
+        return wheel.unschedule(doc_id)
+    job_id = f"auto_recruit_{doc_id}"
+    if not scheduler.get_job(job_id):
+        return False
+    scheduler.remove_job(job_id)
+    logger.info(f"Unscheduled recruitment post for document {doc_id}")
+    return True
+
+
 def schedule_recruitment_post(
-    bot: hikari.GatewayBot,
-    mongo: MongoClient,
-    coc_client: coc.Client,
     doc_id: str,
     discord_id: str,
     post_time: str,
-    timezone_str: str = "America/New_York"
-) -> None:
-    """Schedule a recruitment post for a specific user"""
+    timezone_str: str = DEFAULT_TIMEZONE,
+    fingerprint: str = ""
+) -> bool:
+    """Schedule a recruitment post for a specific user, returns True on success"""
     global scheduler
     
     try:
@@ -200,112 +503,230 @@ def schedule_recruitment_post(
         
         # Create job ID using document ID
         job_id = f"auto_recruit_{doc_id}"
+        trigger = CronTrigger(hour=hour, minute=minute, timezone=tz)
+        # Only IDs in the args - jobs are pickled into the job store, the rest comes from bot_data
+        args = [doc_id, discord_id]
         
-        # Remove existing job if any
         if scheduler.get_job(job_id):
-            scheduler.remove_job(job_id)
-        
-        # Schedule the job - pass both doc_id and discord_id
-        scheduler.add_job(
-            func=post_recruitment,
-            trigger=CronTrigger(hour=hour, minute=minute, timezone=tz),
-            args=[bot, mongo, coc_client, doc_id, discord_id],
-            id=job_id,
-            replace_existing=True,
-            misfire_grace_time=3600  # Allow up to 1 hour late
-        )
+            # Modify the existing job in place instead of removing and re-adding it
+            scheduler.modify_job(job_id, args=args, name=fingerprint)
+            scheduler.reschedule_job(job_id, trigger=trigger)
+        else:
+            # The name holds the fingerprint so the reconciler can be restored after a restart
+            scheduler.add_job(
+                func=post_recruitment,
+                trigger=trigger,
+                args=args,
+                id=job_id,
+                name=fingerprint,
+                jobstore=PERSISTENT_JOBSTORE,
+                replace_existing=True,
+                misfire_grace_time=MISFIRE_GRACE_SECONDS,  # Later than this goes through the catch-up policy
+                coalesce=True
+            )
         
         logger.info(f"Scheduled recruitment post for Discord user {discord_id} (doc {doc_id}) at {post_time} {timezone_str}")
+        return True
         
     except Exception as e:
         logger.error(f"Error scheduling post for Discord user {discord_id}: {e}")
+        return False
+
 
+async def post_recruitment(doc_id: str, discord_id: str) -> None:
+    """Scheduled job - hand the post to the dispatcher so same-minute posts go out as one batch"""
+    await dispatcher.submit(doc_id, discord_id)
 
-async def post_recruitment(
+
+async def fire_wheel_minute(
     bot: hikari.GatewayBot,
     mongo: MongoClient,
     coc_client: coc.Client,
-    doc_id: str,
-    discord_id: str
+    scheduled_at: datetime,
+    entries: list
 ) -> None:
-    """Post a recruitment message for a user"""
+    """Timer wheel callback - everything due in one minute, already batched"""
+    now = datetime.now(timezone.utc)
+    lag = max((now - scheduled_at).total_seconds(), 0.0)
+    if lag > MISFIRE_GRACE_SECONDS:
+        # Same as an APScheduler misfire - go through the catch-up policy
+        logger.warning(f"{len(entries)} recruitment post(s) due at {scheduled_at} missed by {lag:.0f}s")
+        schedule_catch_up([(doc_id, discord_id, scheduled_at) for doc_id, discord_id in entries])
+        return
+    
+    SCHEDULER_LAG_SECONDS.observe(lag)
+    for doc_id, _ in entries:
+        event_log.record_fired(f"auto_recruit_{doc_id}", scheduled_at, now)
+    logger.info(f"Dispatching {len(entries)} recruitment post(s) due at {scheduled_at}")
+    await post_recruitment_batch(bot, mongo, coc_client, entries)
+
+
+def document_id(doc_id: str):
+    """Convert a job's document ID back to the type stored in MongoDB"""
+    return ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+
+
+async def post_recruitment_batch(
+    bot: hikari.GatewayBot,
+    mongo: MongoClient,
+    coc_client: coc.Client,
+    entries: list
+) -> None:
+    """Post recruitment messages for every (doc_id, discord_id) due in the same minute"""
+    claimed = set()
+    posted = set()
     try:
-        # Get auto-post data using document ID
-        # Try to find by ObjectId first, then by string if that fails
-        try:
-            auto_data = await mongo.auto_recruit.find_one({"_id": ObjectId(doc_id)})
-        except:
-            # If ObjectId conversion fails, try as string
-            auto_data = await mongo.auto_recruit.find_one({"_id": doc_id})
-        
-        if not auto_data or not auto_data.get("enabled"):
-            logger.info(f"Auto-post disabled or not found for document {doc_id}")
+        # Claim the posts first so another instance can't post the same run
+        claimed = await mongo.claim_auto_posts(
+            (document_id(doc_id) for doc_id, _ in entries),
+            INSTANCE_ID,
+            POST_CLAIM_SECONDS
+        )
+        if len(claimed) < len(entries):
+            logger.info(f"Skipping {len(entries) - len(claimed)} recruitment post(s) already claimed by another instance")
+        entries = [(doc_id, discord_id) for doc_id, discord_id in entries if doc_id in claimed]
+        if not entries:
             return
         
-        # Get recruitment data using discord_id
-        recruit_data = await mongo.recruit_data.find_one({"_id": discord_id})
-        if not recruit_data:
-            logger.error(f"No recruitment data found for Discord user {discord_id}")
-            # Disable auto-post
-            # Update using the same ID type we found the document with
-            update_id = ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
-            await mongo.auto_recruit.update_one(
-                {"_id": update_id},
-                {"$set": {"enabled": False, "error": "No recruitment data found"}}
-            )
-            return
+        # Load every auto-post and recruitment document with one query per collection
+        auto_docs = await mongo.get_auto_posts(document_id(doc_id) for doc_id, _ in entries)
+        recruit_docs = await mongo.get_recruit_posts({discord_id for _, discord_id in entries})
         
-        # Get clan data - prioritize auto_data clan_tag (the one they specifically set up)
-        clan_tag = auto_data.get("clan_tag")
-        if not clan_tag:
-            # Fallback to recruit_data clan_tag if not in auto_data
-            clan_tag = recruit_data.get("clan_tag")
+        # Work out what each post needs before touching the API
+        pending = []
+        for doc_id, discord_id in entries:
+            auto_data = auto_docs.get(doc_id)
+            if not auto_data or not auto_data.get("enabled"):
+                logger.info(f"Auto-post disabled or not found for document {doc_id}")
+                continue
+            
+            recruit_data = recruit_docs.get(discord_id)
+            if not recruit_data:
+                logger.error(f"No recruitment data found for Discord user {discord_id}")
+                await disable_auto_post(mongo, doc_id, "No recruitment data found")
+                continue
+            
+            # Get clan data - prioritize auto_data clan_tag (the one they specifically set up)
+            clan_tag = auto_data.get("clan_tag") or recruit_data.get("clan_tag")
             if not clan_tag:
                 logger.error(f"No clan tag found for Discord user {discord_id}")
-                return
+                continue
+            
+            channel_id = auto_data.get("channel_id", RECRUITMENT_CHANNEL_ID)
+            if not channel_id:
+                logger.error(f"No channel ID found for Discord user {discord_id}")
+                continue
+            
+            pending.append((doc_id, discord_id, clan_tag, int(channel_id), recruit_data))
         
-        try:
-            clan = await coc_client.get_clan(clan_tag)
-        except coc.NotFound:
-            logger.error(f"Clan {clan_tag} not found for Discord user {discord_id}")
-            # Disable auto-post
-            # Update using the same ID type we found the document with
-            update_id = ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
-            await mongo.auto_recruit.update_one(
-                {"_id": update_id},
-                {"$set": {"enabled": False, "error": f"Clan {clan_tag} not found"}}
-            )
-            return
-        except Exception as e:
-            logger.error(f"Error fetching clan {clan_tag}: {e}")
+        if not pending:
             return
         
-        # Build the recruitment message
-        channel_id = auto_data.get("channel_id", RECRUITMENT_CHANNEL_ID)
-        if not channel_id:
-            logger.error(f"No channel ID found for Discord user {discord_id}")
-            return
+        # Fetch every distinct clan concurrently
+        clans = await fetch_clans(bot_data.data["clan_cache"], {clan_tag for _, _, clan_tag, _, _ in pending})
+        
+        # Check saved images up front (cached per URL) - a broken one is left out instead of breaking the post
+        image_checks = await check_images(
+            bot_data.data["image_validator"],
+            {recruit_data.get("image_url") for *_, recruit_data in pending} - {None, ""}
+        )
+        
+        # Group posts by channel so each channel gets a single info message refresh
+        by_channel = {}
+        for doc_id, discord_id, clan_tag, channel_id, recruit_data in pending:
+            clan = clans.get(clan_tag)
+            if isinstance(clan, coc.NotFound):
+                logger.error(f"Clan {clan_tag} not found for Discord user {discord_id}")
+                await disable_auto_post(mongo, doc_id, f"Clan {clan_tag} not found")
+                continue
+            if isinstance(clan, Exception) or clan is None:
+                logger.error(f"Error fetching clan {clan_tag}: {clan}")
+                continue
+            image_check = image_checks.get(recruit_data.get("image_url"))
+            if image_check and not image_check.ok:
+                logger.warning(f"Posting without image for Discord user {discord_id}: {image_check.reason}")
+                recruit_data = {**recruit_data, "image_url": None}
+            by_channel.setdefault(channel_id, []).append((doc_id, discord_id, clan, recruit_data))
         
+        queue = bot_data.data["message_queue"]
+        results = await asyncio.gather(*(
+            post_to_channel(queue, mongo, channel_id, posts)
+            for channel_id, posts in by_channel.items()
+        ))
+        posted = set().union(*results)
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in post_recruitment_batch: {e}")
+    finally:
+        # Successful posts keep their claim so no one re-posts the run - the rest can be retried
+        unposted = claimed - posted
+        if unposted:
+            try:
+                await mongo.release_auto_posts((document_id(doc_id) for doc_id in unposted), INSTANCE_ID)
+            except Exception as e:
+                logger.error(f"Failed to release claims on {len(unposted)} recruitment post(s): {e}")
+
+
+async def fetch_clans(clan_cache: ClanCache, clan_tags: set) -> dict:
+    """Fetch clans concurrently, returns clan tag -> clan (or the exception raised fetching it)"""
+    semaphore = asyncio.Semaphore(CLAN_FETCH_CONCURRENCY)
+    
+    async def fetch(clan_tag: str):
+        async with semaphore:
+            try:
+                return clan_tag, await clan_cache.get_clan(clan_tag)
+            except Exception as e:
+                return clan_tag, e
+    
+    results = await asyncio.gather(*(fetch(clan_tag) for clan_tag in clan_tags))
+    return dict(results)
+
+
+async def check_images(image_validator: ImageValidator, image_urls: set) -> dict:
+    """Check image URLs concurrently, returns URL -> ImageCheck"""
+    urls = list(image_urls)
+    results = await asyncio.gather(*(image_validator.check(url) for url in urls))
+    return dict(zip(urls, results))
+
+
+async def disable_auto_post(mongo: MongoClient, doc_id: str, error: str) -> None:
+    """Disable an auto-post and record why"""
+    await mongo.auto_recruit.update_one(
+        {"_id": document_id(doc_id)},
+        {"$set": {"enabled": False, "error": error}}
+    )
+
+
+async def post_to_channel(
+    queue: MessageQueue,
+    mongo: MongoClient,
+    channel_id: int,
+    posts: list
+) -> set:
+    """
+    Post a batch of recruitment messages to one channel, then mark the info message for a re-post
+
+    Returns:
+        doc_ids of the posts that went out
+    """
+    
+    async def post_one(doc_id: str, discord_id: str, clan: coc.Clan, recruit_data: dict) -> bool:
         # Create the message components
-        components = await create_recruitment_components(
-            clan=clan,
+        components = render_recruitment_post(
+            clan=ClanSnapshot.from_clan(clan),
             recruitment_message=recruit_data.get("description", "Join our clan!"),
             image_url=recruit_data.get("image_url"),
             discord_link=recruit_data.get("discord_link"),
             posted_by_id=int(discord_id)
         )
         
-        # Send the message
         try:
-            message = await bot.rest.create_message(
-                channel=channel_id,
-                components=components
-            )
+            # The channel queue keeps these in order and paced to the channel rate limit
+            message = await queue.create_message(channel_id, components=components)
             
-            # Update last posted time
-            update_id = ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
-            await mongo.auto_recruit.update_one(
-                {"_id": update_id},
+            # Update last posted time (batched with the rest of this burst)
+            writes.add("auto_recruit", UpdateOne(
+                {"_id": document_id(doc_id)},
                 {
                     "$set": {
                         "last_posted": datetime.now(timezone.utc),
@@ -313,10 +734,10 @@ async def post_recruitment(
                         "error": None
                     }
                 }
-            )
+            ))
             
             # Update recruit_data with new message ID
-            await mongo.recruit_data.update_one(
+            writes.add("recruit_data", UpdateOne(
                 {"_id": discord_id},
                 {
                     "$set": {
@@ -324,175 +745,28 @@ async def post_recruitment(
                         "channel_id": channel_id
                     }
                 }
-            )
-            
-            # Check if there's an existing recruitment info message and delete it
-            recruitment_info_data = await mongo.recruit_data.find_one({"_id": "recruitment_info_message"})
-            if recruitment_info_data and "message_id" in recruitment_info_data and "channel_id" in recruitment_info_data:
-                try:
-                    await bot.rest.delete_message(
-                        channel=recruitment_info_data["channel_id"],
-                        message=recruitment_info_data["message_id"]
-                    )
-                except Exception:
-                    # Ignore errors if message doesn't exist
-                    pass
-            
-            # Create recruitment info embed
-            info_container = Container(
-                accent_color=GREEN_ACCENT,
-                components=[
-                    Text(content="## 📢 **Jo Nation Recruitment Post Process**"),
-                    Separator(divider=True),
-                    Text(content=(
-                        "Our recruitment channels use the **@Jo Nation Helper** to post your recruitment ads. "
-                        "This ensures they match our post guidelines. To post, run command `/post-clan`. "
-                        "Then, add your clan tag, description, and an optional image. You can also save this info for next time. "
-                        "Remember, you can post once every 12 hours."
-                    )),
-                    Separator(divider=True),
-                    Media(items=[MediaItem(media="https://res.cloudinary.com/dxmtzuomk/image/upload/v1753197822/misc_images/image.jpg")])
-                ]
-            )
-            
-            # Send recruitment info message
-            info_message = await bot.rest.create_message(
-                channel=channel_id,
-                components=[info_container]
-            )
-            
-            # Store the message ID for future deletion
-            await mongo.recruit_data.replace_one(
-                {"_id": "recruitment_info_message"},
-                {
-                    "_id": "recruitment_info_message",
-                    "message_id": info_message.id,
-                    "channel_id": channel_id,
-                    "updated_at": datetime.now(timezone.utc)
-                },
-                upsert=True
-            )
-            
-            logger.info(f"Successfully posted recruitment and info message for Discord user {discord_id}")
+            ))
+            logger.info(f"Successfully posted recruitment message for Discord user {discord_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Error posting message for Discord user {discord_id}: {e}")
+            ERRORS_TOTAL.inc(source="auto_post")
             # Update error status
-            update_id = ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
-            await mongo.auto_recruit.update_one(
-                {"_id": update_id},
+            writes.add("auto_recruit", UpdateOne(
+                {"_id": document_id(doc_id)},
                 {"$set": {"error": str(e)}}
-            )
-            
-    except Exception as e:
-        logger.error(f"Unexpected error in post_recruitment for Discord user {discord_id}: {e}")
-
-
-async def create_recruitment_components(
-    clan: coc.Clan,
-    recruitment_message: str,
-    image_url: str = None,
-    discord_link: str = None,
-    posted_by_id: int = None
-) -> list:
-    """Create the recruitment message components"""
-    # Calculate capital hall level
-    if clan and clan.capital_districts:
-        peak = max(d.hall_level for d in clan.capital_districts)
-    else:
-        peak = 0
-    
-    # Get clan tag without #
-    clan_tag_clean = clan.tag.replace("#", "")
-    
-    # Use the clan's share link if available
-    clan_link = clan.share_link if hasattr(clan, 'share_link') and clan.share_link else f"https://link.clashofclans.com/en?action=OpenClanProfile&tag={clan_tag_clean}"
-    
-    # Build components
-    components = []
-    
-    # Create container
-    container = Container(
-        accent_color=CYAN_ACCENT,
-        components=[
-            # Title
-            Text(content=f"## ⚔️ **{clan.name} Recruitment**"),
-            Separator(divider=True),
-            
-            # Clan Basic Info Section with Badge
-            Section(
-                components=[
-                    Text(content=(
-                        f"📌 **Clan Tag:** `{clan.tag}`\n"
-                        f"🎖️ **Clan Level:** {clan.level}\n"
-                        f"⛰️ **Capital Hall:** Level {peak}\n"
-                        f"🏆 **Trophies:** {clan.points:,}\n"
-                        f"👥 **Members:** {clan.member_count}\n"
-                        f"🌐 **Location:** {clan.location.name if clan.location else 'International'}\n"
-                        f"🗣️ **Language:** {clan.chat_language.name if hasattr(clan, 'chat_language') and clan.chat_language else 'Unknown'}"
-                    ))
-                ],
-                accessory=Thumbnail(media=clan.badge.url) if hasattr(clan, 'badge') and clan.badge else None
-            ),
-            
-            Separator(divider=True),
-            
-            # Clan Stats
-            Text(content=(
-                f"## 📊 **War Information**\n"
-                f"• **War League:** {clan.war_league.name if clan.war_league else 'Unranked'}\n"
-                f"• **War Wins:** {clan.war_wins}\n"
-                f"• **War Frequency:** {clan.war_frequency if hasattr(clan, 'war_frequency') else 'Always'}\n"
-                f"• **Win Streak:** {clan.war_win_streak if hasattr(clan, 'war_win_streak') else 0}"
-            )),
-            
-            Separator(divider=True),
-            
-            # Recruitment Message
-            Text(content="## 📋 **About Our Clan**"),
-            Text(content=recruitment_message),
-        ]
-    )
-    
-    # Add image if provided
-    if image_url:
-        container.add_component(Separator(divider=True))
-        container.add_component(Media(items=[MediaItem(media=image_url)]))
-    
-    # Add buttons
-    button_row = ActionRow(components=[])
-    button_row.add_component(
-        LinkButton(
-            url=clan_link,
-            label="📱 Apply In-Game"
-        )
-    )
-    
-    if discord_link:
-        button_row.add_component(
-            LinkButton(
-                url=discord_link,
-                label="💬 Join Discord"
-            )
-        )
-    
-    container.add_component(button_row)
-    container.add_component(Separator(divider=True))
-    
-    # Add footer
-    if posted_by_id:
-        container.add_component(
-            Text(content=f"\n-# Posted by <@{posted_by_id}> • <t:{int(datetime.now(timezone.utc).timestamp())}:f>")
-        )
-    else:
-        container.add_component(
-            Text(content=f"\n-# Posted • <t:{int(datetime.now(timezone.utc).timestamp())}:f>")
-        )
+            ))
+            return False
     
-    components.append(container)
+    writes = bot_data.data["write_buffer"]
+    results = await asyncio.gather(*(post_one(*post) for post in posts))
     
-    return components
+    if any(results):
+        # Re-posted once the channel goes quiet, not once per batch
+        bot_data.data["info_message_manager"].touch(channel_id)
+    return {post[0] for post, ok in zip(posts, results) if ok}
 
 
 # No longer exporting functions since commands are removed
-# Everything is now managed through MongoDB polling
\ No newline at end of file
+# Everything is now managed through the MongoDB change stream (or polling as a fallback)
\ No newline at end of file
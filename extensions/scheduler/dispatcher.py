@@ -0,0 +1,81 @@
+"""
+Post Dispatcher - Groups auto-recruit jobs that fire in the same minute into one batch
+
+Popular round times like "14:00" make the scheduler fire dozens of jobs at once.
+Instead of each job doing its own lookups and posts, jobs are collected for a
+short window and handed to a single batch handler.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+# How long to keep a bucket open for other jobs due in the same minute
+BATCH_COLLECT_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+# (doc_id, discord_id) of a job waiting to be posted
+BatchEntry = Tuple[str, str]
+
+
+class _Bucket:
+    """Jobs due in one minute, plus a future resolved once they've been posted"""
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.entries: List[BatchEntry] = []
+        self.done = asyncio.get_running_loop().create_future()
+
+
+class PostDispatcher:
+    """Collects jobs due in the same minute and posts them with one batch call"""
+
+    def __init__(
+        self,
+        post_batch: Callable[[List[BatchEntry]], Awaitable[None]],
+        collect_seconds: float = BATCH_COLLECT_SECONDS
+    ):
+        self._post_batch = post_batch
+        self._collect_seconds = collect_seconds
+        # Minute (epoch // 60) -> bucket still accepting jobs
+        self._open: Dict[int, _Bucket] = {}
+        # Flushes in progress - kept so they aren't garbage-collected and can be awaited on stop
+        self._flushing: Set[asyncio.Task] = set()
+
+    async def stop(self) -> None:
+        """Wait for every open bucket to be posted"""
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def submit(self, doc_id: str, discord_id: str) -> None:
+        """Add a job to the current minute's bucket and wait until its batch has been posted"""
+        minute = int(time.time() // 60)
+        bucket = self._open.get(minute)
+        if bucket is None:
+            bucket = _Bucket(minute)
+            self._open[minute] = bucket
+            task = asyncio.create_task(self._flush_later(bucket))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+        if (doc_id, discord_id) not in bucket.entries:
+            bucket.entries.append((doc_id, discord_id))
+
+        # Shield so a cancelled job doesn't cancel the batch for everyone else
+        await asyncio.shield(bucket.done)
+
+    async def _flush_later(self, bucket: _Bucket) -> None:
+        """Close the bucket after the collect window and post everything in it"""
+        try:
+            await asyncio.sleep(self._collect_seconds)
+            self._open.pop(bucket.minute, None)
+            logger.info(f"Dispatching {len(bucket.entries)} recruitment post(s) due at minute {bucket.minute}")
+            await self._post_batch(bucket.entries)
+        except Exception as e:
+            logger.error(f"Error dispatching recruitment batch: {e}")
+        finally:
+            self._open.pop(bucket.minute, None)
+            if not bucket.done.done():
+                bucket.done.set_result(None)
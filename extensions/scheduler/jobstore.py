@@ -0,0 +1,124 @@
+"""
+Job Store - Persistent APScheduler job store that never blocks the event loop
+
+APScheduler's MongoDBJobStore uses synchronous pymongo, and the scheduler calls
+its job store on the event loop - every get_job/add_job/modify_job and the
+update after each fire would stall the bot on a Mongo round trip. This store
+serves every read from memory (it is a MemoryJobStore) and writes through to
+MongoDB on one background thread, in order. Documents use the MongoDBJobStore
+layout, so the two can read each other's collection.
+
+Call load() before the scheduler starts - that's the only full read, and it
+runs off the loop too. Once the scheduler has shut down, await close() to let
+the queued writes finish (again off the loop).
+"""
+
+import asyncio
+import logging
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from apscheduler.job import Job
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.util import datetime_to_utc_timestamp
+from bson.binary import Binary
+from pymongo import MongoClient, ASCENDING
+
+logger = logging.getLogger(__name__)
+
+
+class CachedMongoJobStore(MemoryJobStore):
+    """In-memory job store with write-behind persistence to a MongoDB collection"""
+
+    def __init__(self, uri: str, database: str, collection: str, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.pickle_protocol = pickle_protocol
+        self._client = MongoClient(host=uri, w=1)
+        self._collection = self._client[database][collection]
+        # One thread, so writes reach MongoDB in the order they were made
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobstore")
+        # Documents read by load(), turned into jobs in start()
+        self._loaded: List[dict] = []
+        self._closed = False
+
+    async def load(self) -> None:
+        """Read every stored job (off the event loop)"""
+        loop = asyncio.get_running_loop()
+        self._loaded = await loop.run_in_executor(self._executor, self._read_all)
+        logger.info(f"Loaded {len(self._loaded)} stored jobs")
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        failed = []
+        for document in self._loaded:
+            try:
+                job = Job.__new__(Job)
+                job.__setstate__(pickle.loads(document["job_state"]))
+                job._scheduler = scheduler
+                job._jobstore_alias = alias
+            except Exception:
+                logger.exception(f"Unable to restore job {document['_id']} - removing it")
+                failed.append(document["_id"])
+                continue
+            super().add_job(job)
+        self._loaded = []
+        if failed:
+            self._submit(self._collection.delete_many, {"_id": {"$in": failed}})
+
+    def add_job(self, job):
+        super().add_job(job)
+        self._submit(self._collection.replace_one, {"_id": job.id}, self._document(job), upsert=True)
+
+    def update_job(self, job):
+        super().update_job(job)
+        self._submit(self._collection.replace_one, {"_id": job.id}, self._document(job), upsert=True)
+
+    def remove_job(self, job_id):
+        super().remove_job(job_id)
+        self._submit(self._collection.delete_one, {"_id": job_id})
+
+    def remove_all_jobs(self):
+        super().remove_all_jobs()
+        self._submit(self._collection.delete_many, {})
+
+    def shutdown(self):
+        # Not MemoryJobStore.shutdown - that would wipe the stored jobs.
+        # Called on the loop by scheduler.shutdown(), so nothing here may wait on MongoDB:
+        # the client is closed on the writer thread once the queued writes are done
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.submit(self._client.close)
+        self._executor.shutdown(wait=False)
+
+    async def close(self) -> None:
+        """Shut down and wait (off the event loop) for the queued writes to finish"""
+        self.shutdown()
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+
+    def _document(self, job: Job) -> dict:
+        return {
+            "_id": job.id,
+            "next_run_time": datetime_to_utc_timestamp(job.next_run_time),
+            "job_state": Binary(pickle.dumps(job.__getstate__(), self.pickle_protocol)),
+        }
+
+    def _read_all(self) -> List[dict]:
+        self._collection.create_index([("next_run_time", ASCENDING)], sparse=True)
+        return list(self._collection.find())
+
+    def _submit(self, operation, *args, **kwargs) -> None:
+        if self._closed:
+            # Only the in-memory copy changes - the scheduler is gone anyway
+            logger.warning("Job store already shut down, not writing job change to MongoDB")
+            return
+        future = self._executor.submit(operation, *args, **kwargs)
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        error: Optional[BaseException] = future.exception()
+        if error:
+            # The in-memory job is still right - only a restart would see the stale copy
+            logger.error(f"Failed to write job to MongoDB: {error}")
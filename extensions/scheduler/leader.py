@@ -0,0 +1,158 @@
+"""
+Leader Lease - Lets one of several bot processes run the auto-post scheduler
+
+Every instance keeps trying to take a lease document in bot_state. The holder
+renews it every third of LEASE_SECONDS; if it dies, the lease expires after
+LEASE_SECONDS and another instance takes over on its next heartbeat. A clean
+shutdown releases the lease straight away.
+
+Expiry is computed and compared with the MongoDB server's clock ($$NOW), so
+clock skew between hosts doesn't matter. Renewal runs in its own loop and the
+elected/demoted callbacks run in a separate task, so a slow scheduler startup
+can't hold up the heartbeat and let the lease lapse.
+
+The lease only decides who schedules. Individual posts are additionally claimed
+on their auto_recruit document (see MongoClient.claim_auto_posts), so a run
+can't go out twice even if two instances briefly both think they're the leader.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from utils.mongo import MongoClient
+
+# bot_state document holding the lease
+LEASE_ID = "auto_recruit_leader"
+# How long a lease lasts without renewal - also the worst-case failover time
+LEASE_SECONDS = int(os.getenv("AUTO_POST_LEASE_SECONDS", "30"))
+# Identifies this process in the lease and in post claims
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """Mongo-based leader election with heartbeat renewal"""
+
+    def __init__(
+        self,
+        mongo: MongoClient,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        instance_id: str = INSTANCE_ID,
+        lease_seconds: float = LEASE_SECONDS
+    ):
+        """
+        Args:
+            on_elected: Called when this instance becomes the leader
+            on_demoted: Called when it stops being the leader (lost or released)
+        """
+        self.mongo = mongo
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.instance_id = instance_id
+        self.lease_seconds = lease_seconds
+        self.is_leader = False
+        # Monotonic time our lease runs out if it isn't renewed
+        self._deadline = 0.0
+        self._task: Optional[asyncio.Task] = None
+        # Latest elected/demoted callback - each one waits for the one before it
+        self._transition: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop campaigning and hand the lease over immediately"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        was_leader = self.is_leader
+        self._set_leader(False)
+        if self._transition:
+            await asyncio.gather(self._transition, return_exceptions=True)
+        if was_leader:
+            try:
+                await self.mongo.bot_state.delete_one({"_id": LEASE_ID, "holder": self.instance_id})
+            except Exception as e:
+                logger.error(f"Failed to release scheduler lease: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self._set_leader(await self._try_acquire())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler lease error: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _try_acquire(self) -> bool:
+        """Take or renew the lease, returns whether we hold it"""
+        started = time.monotonic()
+        try:
+            # Matches only if we hold it or it has expired - otherwise the upsert hits the existing _id.
+            # Times come from the server's clock so hosts don't have to agree on the time
+            await self.mongo.bot_state.update_one(
+                {
+                    "_id": LEASE_ID,
+                    "$or": [
+                        {"holder": self.instance_id},
+                        {"$expr": {"$lt": ["$expires_at", "$$NOW"]}},
+                    ]
+                },
+                [{"$set": {
+                    "holder": self.instance_id,
+                    "expires_at": {"$add": ["$$NOW", int(self.lease_seconds * 1000)]},
+                    "renewed_at": "$$NOW",
+                }}],
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        except Exception as e:
+            # Can't reach Mongo - we're still the leader until our own lease would have run out
+            logger.error(f"Failed to renew scheduler lease: {e}")
+            return self.is_leader and time.monotonic() < self._deadline
+
+        self._deadline = started + self.lease_seconds
+        return True
+
+    def _set_leader(self, leader: bool) -> None:
+        """Record a change of leadership and run its callback in the background"""
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        previous = self._transition
+        if not leader and previous and not previous.done():
+            # Lost the lease while still starting up - stop starting
+            previous.cancel()
+        self._transition = asyncio.create_task(self._run_transition(leader, previous))
+
+    async def _run_transition(self, leader: bool, previous: Optional[asyncio.Task]) -> None:
+        if previous:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        if not leader:
+            logger.warning(f"Instance {self.instance_id} no longer holds the scheduler lease")
+            await self.on_demoted()
+            return
+
+        logger.info(f"Instance {self.instance_id} took the scheduler lease")
+        try:
+            await self.on_elected()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Undo whatever got started - the next heartbeat that renews the lease tries again
+            logger.error(f"Failed to start scheduling: {e}")
+            if self.is_leader:
+                self.is_leader = False
+                await self.on_demoted()
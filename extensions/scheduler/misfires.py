@@ -0,0 +1,182 @@
+"""
+Misfire Tracking - Records when auto-post jobs fire and catches up on missed ones
+
+Every job firing (scheduled vs actual time) and every missed run is written to
+the capped scheduler_events collection. Posts missed during downtime, or dropped
+by APScheduler for being later than the grace time, are handled by the catch-up
+policy instead of all firing at once:
+
+- "once":   post every missed schedule right away
+- "spread": spread the missed posts evenly over AUTO_POST_CATCH_UP_MINUTES
+- "skip":   don't post, just record the miss
+"""
+
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pendulum
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+
+from extensions.scheduler.reconcile import DEFAULT_POST_TIME, DEFAULT_TIMEZONE
+from utils.mongo import MongoClient, ensure_utc_aware
+from utils.write_buffer import WriteBuffer
+
+# How missed posts are handled: "once", "spread" or "skip"
+CATCH_UP_POLICY = os.getenv("AUTO_POST_CATCH_UP", "spread").lower()
+# Window missed posts are spread over with the "spread" policy
+CATCH_UP_MINUTES = int(os.getenv("AUTO_POST_CATCH_UP_MINUTES", "30"))
+# Missed posts older than this are skipped whatever the policy
+CATCH_UP_MAX_AGE = timedelta(hours=int(os.getenv("AUTO_POST_CATCH_UP_MAX_AGE_HOURS", "6")))
+# APScheduler runs a late job up to this long after its scheduled time
+MISFIRE_GRACE_SECONDS = int(os.getenv("AUTO_POST_MISFIRE_GRACE_SECONDS", "3600"))
+
+CATCH_UP_POLICIES = ("once", "spread", "skip")
+
+logger = logging.getLogger(__name__)
+
+if CATCH_UP_POLICY not in CATCH_UP_POLICIES:
+    logger.warning(f"Unknown AUTO_POST_CATCH_UP policy {CATCH_UP_POLICY!r}, using 'spread'")
+    CATCH_UP_POLICY = "spread"
+
+
+def previous_fire_time(post_time: str, timezone_str: str, now: datetime) -> datetime:
+    """The most recent time (at or before now) a daily post at post_time should have fired"""
+    hour, minute = map(int, post_time.split(":"))
+    local_now = pendulum.instance(now).in_timezone(pendulum.timezone(timezone_str))
+    fire_time = local_now.at(hour, minute)
+    if fire_time > local_now:
+        fire_time = fire_time.subtract(days=1).at(hour, minute)
+    return fire_time.in_timezone("UTC")
+
+
+def find_missed_posts(posts: List[dict], now: datetime, max_age: timedelta = CATCH_UP_MAX_AGE) -> List[Tuple[dict, datetime]]:
+    """
+    Enabled auto-posts whose last scheduled run didn't happen
+
+    A post counts as missed if its most recent fire time is within max_age and
+    it hasn't posted since. Documents created after that fire time aren't missed.
+    """
+    missed = []
+    for post_data in posts:
+        if not post_data.get("enabled") or not post_data.get("discord_id"):
+            continue
+        try:
+            fire_time = previous_fire_time(
+                post_data.get("post_time", DEFAULT_POST_TIME),
+                post_data.get("timezone", DEFAULT_TIMEZONE),
+                now
+            )
+        except Exception as e:
+            logger.error(f"Can't work out schedule of document {post_data.get('_id')}: {e}")
+            continue
+
+        if now - fire_time > max_age:
+            continue
+
+        last_posted = post_data.get("last_posted")
+        if last_posted is not None:
+            if ensure_utc_aware(last_posted) >= fire_time:
+                continue
+        elif not isinstance(post_data["_id"], ObjectId) or post_data["_id"].generation_time >= fire_time:
+            # Never posted - only missed if it existed when it should have fired
+            continue
+
+        missed.append((post_data, fire_time))
+    return missed
+
+
+def plan_catch_up(
+    count: int,
+    now: datetime,
+    policy: str = CATCH_UP_POLICY,
+    spread_minutes: int = CATCH_UP_MINUTES
+) -> Optional[List[datetime]]:
+    """
+    When to run each of `count` missed posts
+
+    Returns:
+        Run times in order, or None if the policy is to skip them
+    """
+    if policy == "skip" or count == 0:
+        return None
+    if policy == "once" or count == 1:
+        return [now] * count
+
+    # Evenly spaced, first one right away
+    step = timedelta(minutes=spread_minutes) / count
+    return [now + step * index for index in range(count)]
+
+
+class SchedulerEventLog:
+    """Writes job firings and misses to scheduler_events and summarizes them"""
+
+    def __init__(self, mongo: MongoClient, writes: WriteBuffer):
+        self.mongo = mongo
+        self.writes = writes
+        # Latest lag_summary(), served by stats()
+        self._summary: Dict[str, float] = {}
+
+    def stats(self) -> Dict[str, float]:
+        """The lag summary as of the last refresh_summary()"""
+        return dict(self._summary)
+
+    async def refresh_summary(self) -> None:
+        """Recompute the lag summary (scheduled job - the query is too slow for every metrics scrape)"""
+        try:
+            self._summary = await self.lag_summary()
+        except Exception as e:
+            logger.error(f"Failed to summarize scheduler lag: {e}")
+
+    def record_fired(self, job_id: str, scheduled_at: datetime, fired_at: datetime) -> None:
+        """A job was handed to the executor"""
+        self.writes.add("scheduler_events", InsertOne({
+            "type": "fired",
+            "job_id": job_id,
+            "scheduled_at": scheduled_at,
+            "fired_at": fired_at,
+            "lag_seconds": max((fired_at - scheduled_at).total_seconds(), 0.0),
+        }))
+
+    def record_missed(self, job_id: str, doc_id: str, scheduled_at: datetime, action: str) -> None:
+        """A run was missed - also noted on the auto_recruit document"""
+        now = datetime.now(timezone.utc)
+        self.writes.add("scheduler_events", InsertOne({
+            "type": "missed",
+            "job_id": job_id,
+            "scheduled_at": scheduled_at,
+            "detected_at": now,
+            "action": action,
+        }))
+        self.writes.add("auto_recruit", UpdateOne(
+            {"_id": ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id},
+            {"$set": {"last_missed": scheduled_at, "last_missed_action": action}}
+        ))
+
+    async def lag_summary(self, hours: float = 24) -> Dict[str, float]:
+        """Lag percentiles (seconds) and miss count over the last `hours`"""
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        cursor = self.mongo.scheduler_events.find(
+            {"type": "fired", "scheduled_at": {"$gte": since}},
+            {"lag_seconds": 1, "_id": 0}
+        )
+        lags = sorted([event["lag_seconds"] async for event in cursor])
+        missed = await self.mongo.scheduler_events.count_documents(
+            {"type": "missed", "scheduled_at": {"$gte": since}}
+        )
+
+        def percentile(fraction: float) -> float:
+            if not lags:
+                return 0.0
+            return lags[min(int(fraction * len(lags)), len(lags) - 1)]
+
+        return {
+            "count": len(lags),
+            "missed": missed,
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": lags[-1] if lags else 0.0,
+        }
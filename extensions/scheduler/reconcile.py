@@ -0,0 +1,131 @@
+"""
+Schedule Reconciler - Keeps scheduler jobs in line with auto_recruit documents
+
+Every document is reduced to a fingerprint of the fields its job depends on. An
+in-memory index of fingerprints means only documents whose fingerprint changed
+cause any scheduler work - unchanged jobs keep their trigger and misfire state.
+"""
+
+import hashlib
+import logging
+from typing import Callable, Dict, Iterable, Optional
+
+# Fields a scheduled job depends on
+FINGERPRINT_FIELDS = ("discord_id", "post_time", "timezone", "channel_id", "clan_tag", "enabled")
+
+# Projection for reading only what reconciliation needs
+RECONCILE_PROJECTION = {field: 1 for field in FINGERPRINT_FIELDS}
+
+# Defaults used when a field is missing - must match the scheduler's defaults
+DEFAULT_POST_TIME = "14:00"
+DEFAULT_TIMEZONE = "America/New_York"
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_fingerprint(post_data: dict) -> Optional[str]:
+    """Fingerprint the scheduling fields of a document, None if it shouldn't be scheduled"""
+    if not post_data.get("enabled", False) or not post_data.get("discord_id"):
+        return None
+
+    values = (
+        str(post_data.get("discord_id")),
+        post_data.get("post_time", DEFAULT_POST_TIME),
+        post_data.get("timezone", DEFAULT_TIMEZONE),
+        str(post_data.get("channel_id")),
+        post_data.get("clan_tag"),
+        True,
+    )
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+class ReconcileResult:
+    """Counts of what a reconciliation pass did"""
+
+    def __init__(self):
+        self.added = 0
+        self.changed = 0
+        self.removed = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    def record(self, action: str) -> None:
+        setattr(self, action, getattr(self, action) + 1)
+
+    @property
+    def touched(self) -> int:
+        return self.added + self.changed + self.removed
+
+    def __str__(self):
+        return (
+            f"{self.added} added, {self.changed} changed, "
+            f"{self.removed} removed, {self.unchanged} unchanged, {self.failed} failed"
+        )
+
+
+class ScheduleReconciler:
+    """Applies auto_recruit documents to the scheduler, only touching jobs that changed"""
+
+    def __init__(self, schedule: Callable[[dict], bool], unschedule: Callable[[str], bool]):
+        """
+        Args:
+            schedule: Adds or modifies the job for a document, returns True on success
+            unschedule: Removes the job for a document ID, returns True if one existed
+        """
+        self._schedule = schedule
+        self._unschedule = unschedule
+        # Document ID -> fingerprint of the job currently scheduled for it
+        self.index = {}
+
+    def restore(self, fingerprints: Dict[str, str]) -> None:
+        """Seed the index with jobs that survived a restart in a persistent job store"""
+        self.index.update(fingerprints)
+
+    def apply(self, post_data: dict) -> str:
+        """Apply one document, returns "added", "changed", "removed", "unchanged" or "failed" """
+        doc_id = str(post_data["_id"])
+        fingerprint = schedule_fingerprint(post_data)
+        current = self.index.get(doc_id)
+
+        if fingerprint is None:
+            if not post_data.get("discord_id"):
+                logger.warning(f"Document {doc_id} missing discord_id field")
+            return "removed" if self.remove(doc_id) else "unchanged"
+
+        if fingerprint == current:
+            return "unchanged"
+
+        if not self._schedule(post_data):
+            # Couldn't build a job (bad post_time/timezone) - don't keep a stale one around.
+            # Not indexed, so the next pass tries again
+            logger.warning(f"Failed to schedule document {doc_id}")
+            self.remove(doc_id)
+            return "failed"
+
+        self.index[doc_id] = fingerprint
+        return "added" if current is None else "changed"
+
+    def remove(self, doc_id: str) -> bool:
+        """Remove the job for a document, returns True if there was one"""
+        if self.index.pop(doc_id, None) is None:
+            # Never scheduled (or already removed) - nothing to unschedule
+            return False
+        self._unschedule(doc_id)
+        return True
+
+    def reconcile(self, documents: Iterable[dict]) -> ReconcileResult:
+        """Diff a full set of documents against the index and apply only the differences"""
+        result = ReconcileResult()
+        seen = set()
+
+        for post_data in documents:
+            seen.add(str(post_data["_id"]))
+            result.record(self.apply(post_data))
+
+        # Jobs whose document no longer exists
+        for doc_id in [doc_id for doc_id in self.index if doc_id not in seen]:
+            logger.info(f"Removing orphaned job for document {doc_id}")
+            self.remove(doc_id)
+            result.record("removed")
+
+        return result
@@ -0,0 +1,192 @@
+"""
+Timer Wheel - Minute-granularity scheduling engine for daily recruitment posts
+
+Instead of one APScheduler job and CronTrigger per document, documents sharing a
+(timezone, post_time) are grouped into a slot. Each slot has one precomputed UTC
+fire minute, and occupied minutes are kept in a heap. A single task sleeps until
+the earliest occupied minute and hands every document due in it to one callback.
+
+A slot's next fire minute is recomputed in its own timezone each time it fires,
+so DST changes only ever touch the slots of the affected timezone. Memory and
+wakeups scale with the number of distinct minutes, not documents.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import pendulum
+
+from extensions.scheduler.dispatcher import BatchEntry
+
+# Longest single sleep, so clock jumps (suspend, NTP) are noticed
+WHEEL_MAX_SLEEP_SECONDS = 300.0
+
+logger = logging.getLogger(__name__)
+
+# (timezone, "HH:MM") shared by every document posting at that local time
+SlotKey = Tuple[str, str]
+
+
+def next_fire_minute(slot: SlotKey, after: datetime) -> int:
+    """Epoch minute of the slot's first local post time strictly after `after`"""
+    timezone_str, post_time = slot
+    hour, minute = map(int, post_time.split(":"))
+    local = pendulum.instance(after).in_timezone(pendulum.timezone(timezone_str))
+    fire_time = local.at(hour, minute)
+    if fire_time <= local:
+        fire_time = local.add(days=1).at(hour, minute)
+    return int(fire_time.timestamp()) // 60
+
+
+class TimerWheel:
+    """Daily post schedule kept as slots in a heap of occupied minutes"""
+
+    def __init__(self, fire: Callable[[datetime, List[BatchEntry]], Awaitable[None]]):
+        """
+        Args:
+            fire: Called with the scheduled UTC time and every (doc_id, discord_id) due then
+        """
+        self._fire = fire
+        # Slot -> doc_id -> discord_id
+        self._slots: Dict[SlotKey, Dict[str, str]] = {}
+        # doc_id -> slot it's in
+        self._doc_slots: Dict[str, SlotKey] = {}
+        # Slot -> epoch minute it fires next
+        self._slot_minutes: Dict[SlotKey, int] = {}
+        # Epoch minute -> slots firing in it
+        self._minutes: Dict[int, Set[SlotKey]] = {}
+        # Occupied minutes (may hold minutes emptied since, skipped when popped)
+        self._heap: List[int] = []
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._firing: Set[asyncio.Task] = set()
+        self.wakeups = 0
+
+    def __len__(self):
+        return len(self._doc_slots)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of wheel size and wakeups"""
+        return {
+            "documents": len(self._doc_slots),
+            "slots": len(self._slots),
+            "minutes": len(self._minutes),
+            "wakeups": self.wakeups,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._firing:
+            await asyncio.gather(*self._firing, return_exceptions=True)
+
+    def schedule(self, doc_id: str, discord_id: str, post_time: str, timezone_str: str) -> bool:
+        """Add or move a document, returns False if its post_time/timezone is invalid"""
+        slot = (timezone_str, post_time)
+        if slot not in self._slots:
+            try:
+                minute = next_fire_minute(slot, datetime.now(timezone.utc))
+            except Exception as e:
+                logger.error(f"Can't schedule document {doc_id} at {post_time} {timezone_str}: {e}")
+                return False
+            self._slots[slot] = {}
+            self._add_slot(slot, minute)
+
+        if self._doc_slots.get(doc_id) not in (None, slot):
+            self.unschedule(doc_id)
+        self._slots[slot][doc_id] = discord_id
+        self._doc_slots[doc_id] = slot
+        return True
+
+    def unschedule(self, doc_id: str) -> bool:
+        """Remove a document, returns True if it was scheduled"""
+        slot = self._doc_slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        documents = self._slots[slot]
+        documents.pop(doc_id, None)
+        if not documents:
+            # Last document in the slot - free the slot and its minute
+            del self._slots[slot]
+            self._remove_slot(slot)
+        return True
+
+    def next_run_time(self, doc_id: str) -> Optional[datetime]:
+        """When a document posts next"""
+        slot = self._doc_slots.get(doc_id)
+        if slot is None:
+            return None
+        return datetime.fromtimestamp(self._slot_minutes[slot] * 60, timezone.utc)
+
+    def _add_slot(self, slot: SlotKey, minute: int) -> None:
+        self._slot_minutes[slot] = minute
+        slots = self._minutes.get(minute)
+        if slots is None:
+            slots = self._minutes[minute] = set()
+            heapq.heappush(self._heap, minute)
+            if self._heap[0] == minute:
+                # New earliest minute - wake the loop to shorten its sleep
+                self._changed.set()
+        slots.add(slot)
+
+    def _remove_slot(self, slot: SlotKey) -> None:
+        minute = self._slot_minutes.pop(slot)
+        slots = self._minutes[minute]
+        slots.discard(slot)
+        if not slots:
+            del self._minutes[minute]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                while self._heap and self._heap[0] not in self._minutes:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    self._changed.clear()
+                    await self._changed.wait()
+                    continue
+
+                delay = self._heap[0] * 60 - time.time()
+                if delay > 0:
+                    self._changed.clear()
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), min(delay, WHEEL_MAX_SLEEP_SECONDS))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                self.wakeups += 1
+                self._fire_minute(heapq.heappop(self._heap))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Timer wheel error: {e}")
+                await asyncio.sleep(1)
+
+    def _fire_minute(self, minute: int) -> None:
+        """Hand every document due in a minute to the callback and move their slots to the next day"""
+        slots = self._minutes.pop(minute, set())
+        scheduled_at = datetime.fromtimestamp(minute * 60, timezone.utc)
+        # From now if the loop was held up past a whole day, so a slot never fires twice in a row
+        after = max(scheduled_at, datetime.now(timezone.utc))
+        entries = []
+        for slot in slots:
+            entries.extend(self._slots[slot].items())
+            # Recomputed in the slot's own timezone, so DST is picked up here
+            del self._slot_minutes[slot]
+            self._add_slot(slot, next_fire_minute(slot, after))
+
+        if entries:
+            task = asyncio.create_task(self._fire(scheduled_at, entries))
+            self._firing.add(task)
+            task.add_done_callback(self._firing.discard)
@@ -9,6 +9,17 @@ from utils.mongo import MongoClient
 import coc
 from utils.startup import load_cogs
 from utils.cloudinary_client import CloudinaryClient
+from utils.upload_cache import UploadCache
+from utils.image_pipeline import ImagePipeline
+from utils.image_validator import ImageValidator
+from utils.message_queue import MessageQueue, MAX_RATE_LIMIT_RETRY_SECONDS
+from utils.clan_cache import ClanCache
+from utils.cooldowns import CooldownService
+from utils.write_buffer import WriteBuffer
+from utils.bulk_deleter import BulkDeleter
+from utils.recruitment_info import InfoMessageManager
+from utils.interaction_router import router
+from utils.metrics import metrics, MetricsServer, MongoMetricsListener
 from utils import bot_data
 
 load_dotenv()
@@ -24,11 +35,13 @@ bot = hikari.GatewayBot(
         | hikari.Intents.GUILD_MODERATION
         | hikari.Intents.GUILD_MESSAGE_REACTIONS
     ),
+    # Longer rate limits raise instead of stalling a channel's send queue
+    max_rate_limit=MAX_RATE_LIMIT_RETRY_SECONDS,
 )
 
 client = lightbulb.client_from_app(bot)
 
-mongo_client = MongoClient(uri=os.getenv("MONGODB_URI"))
+mongo_client = MongoClient(uri=os.getenv("MONGODB_URI"), event_listeners=[MongoMetricsListener()])
 clash_client = coc.Client(
     base_url='https://proxy.clashk.ing/v1',
     key_count=10,
@@ -36,18 +49,47 @@ clash_client = coc.Client(
     raw_attribute=True,
 )
 
-cloudinary_client = CloudinaryClient()
+clan_cache = ClanCache(clash_client)
+cooldowns = CooldownService(mongo_client)
+write_buffer = WriteBuffer(mongo_client)
+
+cloudinary_client = CloudinaryClient(upload_cache=UploadCache(mongo_client))
+image_pipeline = ImagePipeline(cloudinary_client)
+image_validator = ImageValidator()
+message_queue = MessageQueue(bot.rest)
+bulk_deleter = BulkDeleter(message_queue)
+info_message_manager = InfoMessageManager(message_queue, mongo_client, write_buffer)
 
 bot_data.data["mongo"] = mongo_client
 bot_data.data["cloudinary_client"] = cloudinary_client
+bot_data.data["image_pipeline"] = image_pipeline
+bot_data.data["image_validator"] = image_validator
 bot_data.data["bot"] = bot
 bot_data.data["coc_client"] = clash_client
+bot_data.data["clan_cache"] = clan_cache
+bot_data.data["cooldowns"] = cooldowns
+bot_data.data["write_buffer"] = write_buffer
+bot_data.data["message_queue"] = message_queue
+bot_data.data["info_message_manager"] = info_message_manager
+bot_data.data["bulk_deleter"] = bulk_deleter
+
+# Components that report their own counters on the /metrics endpoint
+metrics_server = MetricsServer()
+metrics.register_stats("message_queue", message_queue.stats)
+metrics.register_stats("clan_cache", clan_cache.stats)
+metrics.register_stats("bulk_deleter", bulk_deleter.stats)
+metrics.register_stats("write_buffer", write_buffer.stats)
+metrics.register_stats("image_validator", image_validator.stats)
+metrics.register_stats("upload_cache", cloudinary_client.upload_cache.stats)
 
 registry = client.di.registry_for(lightbulb.di.Contexts.DEFAULT)
 registry.register_value(MongoClient, mongo_client)
 registry.register_value(coc.Client, clash_client)
+registry.register_value(ClanCache, clan_cache)
+registry.register_value(CooldownService, cooldowns)
 registry.register_value(CloudinaryClient, cloudinary_client)
 registry.register_value(hikari.GatewayBot, bot)
+registry.register_value(MessageQueue, message_queue)
 
 @bot.listen(hikari.StartingEvent)
 async def on_starting(_: hikari.StartingEvent) -> None:
@@ -59,15 +101,43 @@ async def on_starting(_: hikari.StartingEvent) -> None:
         "extensions.events.message_delete",  # Auto-delete messages in recruitment channel
     ] + load_cogs(disallowed={"example", "post_clan", "post_edit"})
 
+    await metrics_server.start()
+    await mongo_client.ensure_schema()
     await client.load_extensions(*all_extensions)
+    await cooldowns.warm()
     await client.start()
     await clash_client.login_with_tokens("")
 
 
+@bot.listen(hikari.InteractionCreateEvent)
+async def on_interaction(event: hikari.InteractionCreateEvent) -> None:
+    """Route component and modal interactions to the handler registered for their custom_id"""
+    await router.dispatch(event.interaction)
+
+
 @bot.listen(hikari.StoppingEvent)
 async def on_stopping(_: hikari.StoppingEvent) -> None:
     """Bot stopping event"""
+    # Post any pending info message (the send queue itself is closed once the scheduler has stopped)
+    await info_message_manager.flush()
+    await bulk_deleter.flush()
     # Properly close the coc.py client to avoid unclosed session warnings
     await clash_client.close()
+    await image_pipeline.close()
+    await image_validator.close()
+    await cloudinary_client.close()
+    await metrics_server.stop()
+
+
+@bot.listen(hikari.StoppedEvent)
+async def on_stopped(_: hikari.StoppedEvent) -> None:
+    """Bot stopped event - every StoppingEvent listener (scheduler included) has finished"""
+    # Stop channel send queue workers - nothing posts any more
+    await message_queue.close()
+    # Write out any buffered bookkeeping updates
+    await write_buffer.close()
+
 
-bot.run()
\ No newline at end of file
+# Guarded because the image pipeline's worker processes are spawned, and re-import this module
+if __name__ == "__main__":
+    bot.run()
\ No newline at end of file
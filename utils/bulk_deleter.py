@@ -0,0 +1,138 @@
+"""
+Bulk Deleter - Batched removal of unwanted messages from recruitment channels
+
+Message IDs are collected per channel for a short window and removed with one
+bulk delete call per 100 messages, instead of one REST call each. Discord only
+bulk deletes messages younger than 14 days, so older ones are deleted one by one.
+Every call goes through the channel's MessageQueue, so a spam wave can't crowd
+out recruitment posts.
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List
+
+import hikari
+
+from utils.message_queue import MessageQueue
+
+# Collect messages this long before deleting them together
+BULK_DELETE_WINDOW_SECONDS = 1.0
+# Discord refuses to bulk delete messages older than 14 days - keep a margin for clock skew
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=10)
+# Messages per bulk delete call
+BULK_DELETE_CHUNK_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+class BulkDeleter:
+    """Buffers message deletes per channel and removes them in bulk"""
+
+    def __init__(self, queue: MessageQueue, window_seconds: float = BULK_DELETE_WINDOW_SECONDS):
+        self.queue = queue
+        self.window_seconds = window_seconds
+        # Channel ID -> message IDs waiting for the window to close
+        self._pending: Dict[int, List[hikari.Snowflake]] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # Messages handed to the queue but not deleted yet
+        self._in_flight = 0
+        self.deleted = 0
+        self.failed = 0
+
+    @property
+    def backlog(self) -> int:
+        """Messages waiting to be deleted, buffered or queued"""
+        return sum(len(ids) for ids in self._pending.values()) + self._in_flight
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of the delete backlog and totals"""
+        return {
+            "backlog": self.backlog,
+            "deleted": self.deleted,
+            "failed": self.failed,
+        }
+
+    def add(self, channel_id: int, message_id: hikari.Snowflakeish) -> None:
+        """Schedule a message for deletion"""
+        channel_id = int(channel_id)
+        self._pending.setdefault(channel_id, []).append(hikari.Snowflake(message_id))
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = asyncio.create_task(self._flush_later(channel_id))
+
+    async def flush(self) -> None:
+        """Delete everything buffered now"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
+
+        pending, self._pending = self._pending, {}
+        await asyncio.gather(*(self._delete(channel_id, ids) for channel_id, ids in pending.items()))
+
+    async def _flush_later(self, channel_id: int) -> None:
+        await asyncio.sleep(self.window_seconds)
+        self._tasks.pop(channel_id, None)
+        message_ids = self._pending.pop(channel_id, [])
+        if message_ids:
+            await self._delete(channel_id, message_ids)
+
+    async def _delete(self, channel_id: int, message_ids: List[hikari.Snowflake]) -> None:
+        """Bulk delete recent messages, delete older ones individually"""
+        message_ids = list(dict.fromkeys(message_ids))
+        cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+        recent = [message_id for message_id in message_ids if message_id.created_at > cutoff]
+        old = [message_id for message_id in message_ids if message_id.created_at <= cutoff]
+
+        deleted_before = self.deleted
+        self._in_flight += len(message_ids)
+        try:
+            if recent:
+                await self._bulk_delete(channel_id, recent)
+            for message_id in old:
+                await self._delete_one(channel_id, message_id)
+        finally:
+            self._in_flight -= len(message_ids)
+
+        logger.info(
+            f"Deleted {self.deleted - deleted_before}/{len(message_ids)} message(s) in channel {channel_id} "
+            f"({len(old)} too old for bulk delete)"
+        )
+
+    async def _bulk_delete(self, channel_id: int, message_ids: List[hikari.Snowflake]) -> None:
+        # hikari splits this into calls of up to 100 messages
+        calls = math.ceil(len(message_ids) / BULK_DELETE_CHUNK_SIZE)
+        try:
+            await self.queue.submit(
+                channel_id,
+                lambda: self.queue.rest.delete_messages(channel_id, message_ids),
+                cost=calls,
+                route="delete_messages"
+            )
+            self.deleted += len(message_ids)
+        except hikari.BulkDeleteError as e:
+            deleted = len(e.deleted_messages)
+            self.deleted += deleted
+            self.failed += len(message_ids) - deleted
+            logger.error(f"Bulk delete in channel {channel_id} failed after {deleted} message(s): {e.__cause__}")
+        except hikari.ForbiddenError:
+            self.failed += len(message_ids)
+            logger.error(f"No permission to delete messages in channel {channel_id}")
+        except Exception as e:
+            self.failed += len(message_ids)
+            logger.error(f"Error bulk deleting {len(message_ids)} message(s) in channel {channel_id}: {e}")
+
+    async def _delete_one(self, channel_id: int, message_id: hikari.Snowflake) -> None:
+        try:
+            await self.queue.delete_message(channel_id, message_id)
+            self.deleted += 1
+        except hikari.NotFoundError:
+            # Already gone
+            pass
+        except hikari.ForbiddenError:
+            self.failed += 1
+            logger.error(f"No permission to delete message {message_id}")
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error deleting message {message_id}: {e}")
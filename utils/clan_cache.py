@@ -0,0 +1,143 @@
+"""
+Clan Cache - TTL cache in front of coc.Client clan lookups
+
+Clan stats like level and war wins barely change within minutes, but every
+/post-clan, /post-edit and scheduled post fetches the clan through the proxy.
+Lookups are served from memory while fresh, served stale while a background
+refresh runs, and concurrent lookups for the same tag share one request.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict
+
+import coc
+
+from utils.metrics import COC_FETCH_SECONDS, ERRORS_TOTAL
+
+# Served straight from the cache for this long
+CLAN_CACHE_TTL = 300.0
+# After that, served stale (while refreshing in the background) for this long
+CLAN_CACHE_STALE_TTL = 1800.0
+# Maximum number of clans kept
+CLAN_CACHE_MAX_SIZE = 512
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """A cached clan and when it was fetched"""
+
+    __slots__ = ("clan", "fetched_at")
+
+    def __init__(self, clan: coc.Clan, fetched_at: float):
+        self.clan = clan
+        self.fetched_at = fetched_at
+
+
+class ClanCache:
+    """Wraps a coc.Client with a per-tag TTL cache for get_clan - anything else is passed through"""
+
+    def __init__(
+        self,
+        client: coc.Client,
+        ttl: float = CLAN_CACHE_TTL,
+        stale_ttl: float = CLAN_CACHE_STALE_TTL,
+        max_size: int = CLAN_CACHE_MAX_SIZE
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Tag -> in-flight fetch shared by everyone asking for that tag
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def __getattr__(self, name):
+        # Anything other than get_clan goes straight to the wrapped client
+        return getattr(self.client, name)
+
+    async def get_clan(self, tag: str) -> coc.Clan:
+        """Get a clan by tag, from the cache when possible"""
+        tag = coc.utils.correct_tag(tag)
+        entry = self._entries.get(tag)
+        now = time.monotonic()
+
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(tag)
+                return entry.clan
+            if age < self.ttl + self.stale_ttl:
+                # Serve what we have and refresh behind the caller's back
+                self.stale_hits += 1
+                self._entries.move_to_end(tag)
+                if tag not in self._inflight:
+                    self._start_fetch(tag).add_done_callback(_consume_exception)
+                return entry.clan
+
+        self.misses += 1
+        future = self._inflight.get(tag)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self._start_fetch(tag)
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def invalidate(self, tag: str) -> None:
+        """Drop a clan from the cache"""
+        self._entries.pop(coc.utils.correct_tag(tag), None)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of cache counters"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    def _start_fetch(self, tag: str) -> asyncio.Future:
+        """Start the single shared fetch for a tag"""
+        future = asyncio.ensure_future(self._fetch(tag))
+        self._inflight[tag] = future
+        return future
+
+    async def _fetch(self, tag: str) -> coc.Clan:
+        """Fetch a clan from the API and store it"""
+        try:
+            with COC_FETCH_SECONDS.time(operation="get_clan"):
+                clan = await self.client.get_clan(tag)
+        except Exception:
+            self.errors += 1
+            ERRORS_TOTAL.inc(source="coc")
+            raise
+        finally:
+            self._inflight.pop(tag, None)
+
+        self._entries[tag] = _Entry(clan, time.monotonic())
+        self._entries.move_to_end(tag)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return clan
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """Log a failed background refresh - the stale entry keeps being served until it expires"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Background clan refresh failed: {future.exception()}")
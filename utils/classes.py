@@ -1,5 +1,5 @@
 import random
-from utils.emoji import EmojiType
+from utils.emoji import parse_emoji
 
 
 class Clan:
@@ -9,14 +9,9 @@ class Clan:
         self.chat_channel_id: int = data.get("chat_channel_id")
         self.emoji: str = data.get("emoji")
 
-        # only attempt to parse if it at least has two colons
-        if self.emoji.count(":") >= 2:
-            try:
-                self.partial_emoji = EmojiType(self.emoji).partial_emoji
-            except (IndexError, ValueError):
-                self.partial_emoji = None
-        else:
-            self.partial_emoji = None
+        # Parsed once per distinct emoji string, shared by every Clan using it
+        emoji = parse_emoji(self.emoji) if self.emoji else None
+        self.partial_emoji = emoji.partial_emoji if emoji else None
         self.tag: str = data.get("tag")
         self.leader_id: int = data.get("leader_id")
         self.leader_role_id: int = data.get("leader_role_id")
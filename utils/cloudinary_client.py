@@ -1,29 +1,68 @@
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.utils
+import hashlib
 import os
-from typing import Optional, Dict, Any
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, IO, Union
 import aiohttp
 import asyncio
 
+from utils.upload_cache import UploadCache, upload_key
+
+CLOUD_NAME = "dxmtzuomk"
+UPLOAD_URL = f"https://api.cloudinary.com/v1_1/{CLOUD_NAME}/image/upload"
+
+# Uploads allowed in flight at once
+UPLOAD_CONCURRENCY = 4
+# Threads reserved for operations that still go through the synchronous SDK
+SDK_MAX_WORKERS = 2
+# Give up on an upload after this long
+UPLOAD_TIMEOUT_SECONDS = 120
+# Read size when hashing files from disk
+HASH_CHUNK_SIZE = 1024 * 1024
+# How long an upload from a URL is reused - the image behind the URL can change
+URL_UPLOAD_CACHE_TTL = timedelta(hours=6)
+
 
 class CloudinaryClient:
     """Handles all Cloudinary operations for the bot"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        upload_cache: Optional[UploadCache] = None,
+        upload_concurrency: int = UPLOAD_CONCURRENCY,
+        sdk_max_workers: int = SDK_MAX_WORKERS
+    ):
         # Configure Cloudinary using environment variables
         cloudinary.config(
-            cloud_name="dxmtzuomk",
+            cloud_name=CLOUD_NAME,
             api_key=os.getenv("CLOUDINARY_API_KEY"),
             api_secret=os.getenv("CLOUDINARY_API_SECRET"),
             secure=True
         )
+        self._api_key = os.getenv("CLOUDINARY_API_KEY")
+        self._api_secret = os.getenv("CLOUDINARY_API_SECRET")
+        self._upload_slots = asyncio.Semaphore(upload_concurrency)
+        # SDK calls get their own threads instead of the loop's default executor
+        self._executor = ThreadPoolExecutor(max_workers=sdk_max_workers, thread_name_prefix="cloudinary")
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Skips uploads (and CDN invalidations) of images that were already uploaded
+        self.upload_cache = upload_cache
 
     async def upload_image_from_url(self, image_url: str, folder: str, public_id: Optional[str] = None) -> Dict[
         str, Any]:
         """
         Uploads an image from a URL to Cloudinary
 
+        Cloudinary fetches the URL itself, so the image never passes through the bot -
+        repeat uploads are recognised by the URL rather than the image bytes, and only
+        for URL_UPLOAD_CACHE_TTL. Uploads to an explicit public_id always go through,
+        since the asset there may have been replaced by a different image since.
+
         Args:
             image_url: The URL of the image to upload
             folder: The folder path in Cloudinary (e.g., "clan_logos" or "clan_banners")
@@ -33,20 +72,11 @@ class CloudinaryClient:
             Dictionary containing upload results including the secure URL
         """
         try:
-            # Run the upload in a thread pool since cloudinary.uploader is synchronous
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: cloudinary.uploader.upload(
-                    image_url,
-                    folder=folder,
-                    public_id=public_id,
-                    overwrite=True,
-                    invalidate=True,
-                    resource_type="image"
-                )
+            content_hash = "url-" + hashlib.sha256(image_url.encode()).hexdigest()
+            return await self._upload(
+                image_url, folder, public_id, content_hash,
+                use_cache=public_id is None, max_age=URL_UPLOAD_CACHE_TTL
             )
-            return result
         except Exception as e:
             raise Exception(f"Failed to upload image to Cloudinary: {str(e)}")
 
@@ -64,19 +94,28 @@ class CloudinaryClient:
             Dictionary containing upload results
         """
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: cloudinary.uploader.upload(
-                    image_data,
-                    folder=folder,
-                    public_id=public_id,
-                    overwrite=True,
-                    invalidate=True,
-                    resource_type="image"
-                )
-            )
-            return result
+            content_hash = await self._run_blocking(lambda: hashlib.sha256(image_data).hexdigest())
+            return await self._upload(image_data, folder, public_id, content_hash)
+        except Exception as e:
+            raise Exception(f"Failed to upload image to Cloudinary: {str(e)}")
+
+    async def upload_image_from_file(self, path: str, folder: str, public_id: Optional[str] = None) -> Dict[
+        str, Any]:
+        """
+        Uploads an image file from disk to Cloudinary, streaming it instead of reading it into memory
+
+        Args:
+            path: Path to the image file
+            folder: The folder path in Cloudinary
+            public_id: Optional custom ID for the image
+
+        Returns:
+            Dictionary containing upload results
+        """
+        try:
+            content_hash = await self._run_blocking(lambda: hash_file(path))
+            with open(path, "rb") as file:
+                return await self._upload(file, folder, public_id, content_hash)
         except Exception as e:
             raise Exception(f"Failed to upload image to Cloudinary: {str(e)}")
 
@@ -91,11 +130,82 @@ class CloudinaryClient:
             Dictionary containing deletion results
         """
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: cloudinary.uploader.destroy(public_id)
-            )
+            result = await self._run_blocking(lambda: cloudinary.uploader.destroy(public_id))
+            if self.upload_cache:
+                await self.upload_cache.forget_public_id(public_id)
             return result
         except Exception as e:
-            raise Exception(f"Failed to delete image from Cloudinary: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to delete image from Cloudinary: {str(e)}")
+
+    async def close(self) -> None:
+        """Close the HTTP session and the SDK thread pool"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._executor.shutdown(wait=False)
+
+    async def _run_blocking(self, func):
+        """Run a blocking call (SDK, hashing) on the client's own thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=UPLOAD_TIMEOUT_SECONDS))
+        return self._session
+
+    async def _upload(
+        self,
+        file: Union[str, bytes, IO[bytes]],
+        folder: str,
+        public_id: Optional[str],
+        content_hash: str,
+        use_cache: bool = True,
+        max_age: Optional[timedelta] = None
+    ) -> Dict[str, Any]:
+        """Signed multipart upload straight to the Upload API, unless the same image was uploaded before"""
+        key = upload_key(content_hash, folder, public_id)
+        if self.upload_cache and use_cache:
+            cached = await self.upload_cache.get(key, max_age)
+            if cached:
+                return cached
+
+        params = {
+            "folder": folder,
+            "overwrite": "true",
+            "invalidate": "true",
+            "timestamp": str(int(time.time())),
+        }
+        if public_id:
+            params["public_id"] = public_id
+        params["signature"] = cloudinary.utils.api_sign_request(params, self._api_secret)
+        params["api_key"] = self._api_key
+
+        form = aiohttp.FormData()
+        for name, value in params.items():
+            form.add_field(name, value)
+        if isinstance(file, str):
+            # Remote URL - Cloudinary downloads it
+            form.add_field("file", file)
+        else:
+            # Bytes or an open file - aiohttp streams file objects in chunks
+            form.add_field("file", file, filename=public_id or "upload", content_type="application/octet-stream")
+
+        session = await self._get_session()
+        async with self._upload_slots:
+            async with session.post(UPLOAD_URL, data=form) as response:
+                result = await response.json(content_type=None)
+                if response.status != 200:
+                    message = result.get("error", {}).get("message") if isinstance(result, dict) else None
+                    raise Exception(message or f"HTTP {response.status}")
+
+        if self.upload_cache and use_cache:
+            await self.upload_cache.put(key, result)
+        return result
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,124 @@
+"""
+Post Cooldowns - The 12-hour limit between /post-clan posts
+
+Checks are answered from an in-memory map of user ID -> next allowed post time,
+warmed from a projected query on `posted_at`. The slot itself is taken with a
+conditional find_one_and_update, so two fast submits can't both get through.
+"""
+
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils.mongo import MongoClient, ensure_utc_aware
+
+# Time users must wait between posts
+POST_COOLDOWN = timedelta(hours=12)
+
+logger = logging.getLogger(__name__)
+
+
+class Reservation:
+    """A post slot taken by reserve(), kept so it can be given back if the post fails"""
+
+    __slots__ = ("user_id", "reserved_at", "previous_posted_at", "existed")
+
+    def __init__(self, user_id: str, reserved_at: datetime, previous_posted_at: Optional[datetime], existed: bool):
+        self.user_id = user_id
+        self.reserved_at = reserved_at
+        self.previous_posted_at = previous_posted_at
+        self.existed = existed
+
+
+class CooldownService:
+    """Tracks when each user may post again"""
+
+    def __init__(self, mongo: MongoClient, cooldown: timedelta = POST_COOLDOWN):
+        self.mongo = mongo
+        self.cooldown = cooldown
+        # User ID -> time they may post again (only users still on cooldown)
+        self._next_allowed: Dict[str, datetime] = {}
+
+    async def warm(self) -> None:
+        """Load everyone still on cooldown, reading only posted_at"""
+        cutoff = datetime.now(timezone.utc) - self.cooldown
+        cursor = self.mongo.recruit_data.find({"posted_at": {"$gte": cutoff}}, {"posted_at": 1})
+        async for data in cursor:
+            self.record(data["_id"], data["posted_at"])
+        logger.info(f"Loaded {len(self._next_allowed)} active post cooldowns")
+
+    def record(self, user_id, posted_at: datetime) -> None:
+        """Note that a user posted (or had posted_at reset) at the given time"""
+        self._next_allowed[str(user_id)] = ensure_utc_aware(posted_at) + self.cooldown
+
+    def next_allowed(self, user_id) -> Optional[datetime]:
+        """When the user may post again, or None if they may post now"""
+        user_id = str(user_id)
+        next_allowed = self._next_allowed.get(user_id)
+        if next_allowed is None:
+            return None
+        if next_allowed <= datetime.now(timezone.utc):
+            del self._next_allowed[user_id]
+            return None
+        return next_allowed
+
+    async def reserve(self, user_id) -> Tuple[Optional[Reservation], Optional[datetime]]:
+        """
+        Atomically take the user's post slot
+
+        Returns:
+            (reservation, None) if the slot was taken, or (None, next_allowed) if the
+            user is still on cooldown
+        """
+        user_id = str(user_id)
+        now = datetime.now(timezone.utc)
+        # MongoDB stores milliseconds - truncate so release() can match the stored value
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        cutoff = now - self.cooldown
+
+        try:
+            # Only matches if the last post is old enough - otherwise the upsert hits the
+            # existing _id and fails, which is exactly the "on cooldown" case
+            previous = await self.mongo.recruit_data.find_one_and_update(
+                {
+                    "_id": user_id,
+                    "$or": [
+                        {"posted_at": {"$lt": cutoff}},
+                        {"posted_at": {"$exists": False}},
+                        {"posted_at": None},
+                    ]
+                },
+                {"$set": {"posted_at": now}},
+                projection={"posted_at": 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            posted_at = await self.mongo.get_posted_at(user_id)
+            if posted_at:
+                self.record(user_id, posted_at)
+            return None, self.next_allowed(user_id)
+
+        self.record(user_id, now)
+        previous_posted_at = previous.get("posted_at") if previous else None
+        return Reservation(user_id, now, previous_posted_at, previous is not None), None
+
+    async def release(self, reservation: Reservation) -> None:
+        """Give back a slot whose post failed"""
+        # Only undo our own reservation, not a post that happened since
+        own_reservation = {"_id": reservation.user_id, "posted_at": reservation.reserved_at}
+        if not reservation.existed:
+            # reserve() created a bare {_id, posted_at} document - don't leave an empty record behind
+            await self.mongo.recruit_data.delete_one(own_reservation)
+        elif reservation.previous_posted_at:
+            await self.mongo.recruit_data.update_one(own_reservation, {"$set": {"posted_at": reservation.previous_posted_at}})
+        else:
+            await self.mongo.recruit_data.update_one(own_reservation, {"$unset": {"posted_at": ""}})
+        if reservation.previous_posted_at:
+            self.record(reservation.user_id, reservation.previous_posted_at)
+        else:
+            self._next_allowed.pop(reservation.user_id, None)
+
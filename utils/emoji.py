@@ -1,26 +1,55 @@
 
 
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
 import hikari
 
+# <:Name:123> or <a:Name:123>
+EMOJI_PATTERN = re.compile(r"<(a?):(\w+):(\d+)>")
+
 
 class EmojiType:
+    """A custom emoji string, parsed once"""
+
+    __slots__ = ("emoji_string", "name", "id", "animated", "partial_emoji")
+
     def __init__(self, emoji_string):
+        match = EMOJI_PATTERN.fullmatch(emoji_string.strip())
+        if not match:
+            raise ValueError(f"Not a custom emoji: {emoji_string!r}")
+
         self.emoji_string = emoji_string
-        self.str = emoji_string
+        self.animated = match.group(1) == "a"
+        self.name = match.group(2)
+        self.id = hikari.Snowflake(int(match.group(3)))
+        # Built once and shared - CustomEmoji is immutable
+        self.partial_emoji = hikari.CustomEmoji(
+            name=self.name,
+            id=self.id,
+            is_animated=self.animated
+        )
+
+    @property
+    def str(self):
+        return self.emoji_string
 
     def __str__(self):
         return self.emoji_string
 
-    @property
-    def partial_emoji(self):
-        emoji = self.emoji_string.split(':')
-        animated = '<a:' in self.emoji_string
-        emoji = hikari.CustomEmoji(
-            name=emoji[1][1:],
-            id=hikari.Snowflake(int(str(emoji[2])[:-1])),
-            is_animated=animated
-        )
-        return emoji
+
+@lru_cache(maxsize=1024)
+def parse_emoji(emoji_string: str) -> Optional[EmojiType]:
+    """Interned EmojiType for an emoji string (e.g. from a clan document), or None if it isn't one"""
+    # Reuse the bot's own emojis when it's one of them
+    registered = emojis.by_string(emoji_string)
+    if registered is not None:
+        return registered
+    try:
+        return EmojiType(emoji_string)
+    except (TypeError, ValueError):
+        return None
 
 class Emojis:
     def __init__(self):
@@ -81,11 +110,32 @@ class Emojis:
         self.Silver2 = EmojiType("<:SL_2:1387845644487491594>")
         self.Silver3 = EmojiType("<:SL_3:1387845621095989318>")
 
-emojis = Emojis()
-
-
-
-
-
-
+        # Lookup tables, built once from the attributes above
+        self._by_name: Dict[str, EmojiType] = {}
+        self._by_id: Dict[int, EmojiType] = {}
+        self._by_string: Dict[str, EmojiType] = {}
+        for attribute, emoji in list(vars(self).items()):
+            if isinstance(emoji, EmojiType):
+                # Both the attribute name (TH12) and the Discord name (TH_12)
+                self._by_name[attribute] = emoji
+                self._by_name.setdefault(emoji.name, emoji)
+                self._by_id[emoji.id] = emoji
+                self._by_string[emoji.emoji_string] = emoji
+
+    def get(self, name: str) -> Optional[EmojiType]:
+        """Emoji by attribute name (e.g. "TH12") or Discord name (e.g. "TH_12")"""
+        return self._by_name.get(name)
+
+    def by_id(self, emoji_id: int) -> Optional[EmojiType]:
+        """Emoji by Discord ID"""
+        return self._by_id.get(int(emoji_id))
+
+    def by_string(self, emoji_string: str) -> Optional[EmojiType]:
+        """Emoji by its full <:Name:ID> string"""
+        return self._by_string.get(emoji_string)
+
+    def town_hall(self, level: int) -> Optional[EmojiType]:
+        """Town Hall emoji for a TH level"""
+        return self._by_name.get(f"TH{level}")
 
+emojis = Emojis()
@@ -0,0 +1,191 @@
+"""
+Image Pipeline - Shrinks user-supplied recruitment images before they are posted
+
+The image is downloaded once (with a size cap), checked, downscaled and
+re-encoded to WebP or JPEG (whichever is smaller) under a byte budget in a
+process pool, then uploaded to Cloudinary. Posts link the small Cloudinary copy instead of the original,
+which is often a multi-megabyte PNG banner.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import aiohttp
+from PIL import Image, ImageOps, features
+
+from utils.cloudinary_client import CloudinaryClient, CLOUD_NAME
+from utils import safe_http
+
+# Refuse to download anything bigger than this
+IMAGE_MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+# Re-encode until the image fits in this many bytes
+IMAGE_TARGET_BYTES = 500 * 1024
+# Refuse to decode images with more pixels than this (decompression bombs)
+IMAGE_MAX_PIXELS = 40_000_000
+# Longest side after downscaling
+IMAGE_MAX_DIMENSION = 1600
+# Formats we accept from users
+IMAGE_ALLOWED_FORMATS = {"PNG", "JPEG", "WEBP", "GIF"}
+# Qualities tried in order before downscaling further
+IMAGE_QUALITY_STEPS = (85, 75, 65, 55)
+# Cloudinary folder for processed images
+IMAGE_FOLDER = "recruitment_images"
+# Worker processes for image processing
+IMAGE_WORKERS = 2
+
+# Images already hosted by us don't need processing again
+HOSTED_PREFIX = f"https://res.cloudinary.com/{CLOUD_NAME}/"
+
+logger = logging.getLogger(__name__)
+
+
+class ImageError(Exception):
+    """The image can't be used - the message is shown to the user"""
+
+
+def output_formats(image: Image.Image) -> List[str]:
+    """Formats an image can be re-encoded to - WebP if Pillow has it, JPEG unless there's transparency"""
+    formats = []
+    if features.check("webp"):
+        formats.append("WEBP")
+    if image.mode == "RGB":
+        formats.append("JPEG")
+    # Transparent and no WebP support - lossless is all that's left
+    return formats or ["PNG"]
+
+
+def encode_smallest(image: Image.Image, formats: List[str], quality: int) -> bytes:
+    """Encode an image in each format at a quality and keep the smallest"""
+    best = None
+    for image_format in formats:
+        output = io.BytesIO()
+        if image_format == "WEBP":
+            image.save(output, format="WEBP", quality=quality, method=4)
+        elif image_format == "JPEG":
+            image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(output, format="PNG", optimize=True)
+        if best is None or output.tell() < len(best):
+            best = output.getvalue()
+    return best
+
+
+def process_image(data: bytes, max_dimension: int = IMAGE_MAX_DIMENSION, target_bytes: int = IMAGE_TARGET_BYTES) -> Optional[bytes]:
+    """
+    Downscale and re-encode an image to WebP or JPEG under the byte budget (runs in a worker process)
+
+    Returns:
+        The encoded image, or None if the original should be used as-is (animated images)
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Exception:
+        raise ImageError("The link doesn't point to an image.")
+    # Only the header has been read so far - check the size before decoding anything
+    if image.width * image.height > IMAGE_MAX_PIXELS:
+        raise ImageError(f"The image is too large ({image.width}x{image.height} pixels).")
+    try:
+        image.load()
+    except Exception:
+        raise ImageError("The link doesn't point to an image.")
+
+    if image.format not in IMAGE_ALLOWED_FORMATS:
+        raise ImageError(f"{image.format} images aren't supported. Please use PNG, JPEG, WebP or GIF.")
+    if getattr(image, "is_animated", False):
+        # Re-encoding would drop the animation
+        return None
+
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    formats = output_formats(image)
+
+    while True:
+        for quality in IMAGE_QUALITY_STEPS:
+            encoded = encode_smallest(image, formats, quality)
+            if len(encoded) <= target_bytes:
+                return encoded
+        if max(image.size) <= 256:
+            # As small as it's worth going
+            return encoded
+        image = image.resize((image.width * 3 // 4, image.height * 3 // 4), Image.LANCZOS)
+
+
+class ImagePipeline:
+    """Downloads, shrinks and re-hosts recruitment images"""
+
+    def __init__(self, cloudinary_client: CloudinaryClient, workers: int = IMAGE_WORKERS):
+        self.cloudinary_client = cloudinary_client
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def prepare(self, image_url: str) -> str:
+        """
+        Get the URL to post for a user-supplied image
+
+        Raises:
+            ImageError: If the image is missing, too large or not an image
+        """
+        if image_url.startswith(HOSTED_PREFIX):
+            return image_url
+
+        data = await self._download(image_url)
+        loop = asyncio.get_running_loop()
+        processed = await loop.run_in_executor(self._get_pool(), process_image, data)
+        if processed is None:
+            return image_url
+
+        try:
+            result = await self.cloudinary_client.upload_image_from_bytes(processed, IMAGE_FOLDER)
+        except Exception as e:
+            # The original still works, just slower
+            logger.error(f"Failed to upload processed image for {image_url}: {e}")
+            return image_url
+
+        logger.info(f"Processed image {image_url}: {len(data)} -> {len(processed)} bytes")
+        return result["secure_url"]
+
+    async def close(self) -> None:
+        """Stop the worker processes and close the HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process with running threads (asyncio, pymongo) can deadlock the child
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _download(self, image_url: str) -> bytes:
+        """Download an image, giving up as soon as it goes over the size cap"""
+        if not image_url.startswith(("http://", "https://")):
+            raise ImageError("Please provide a direct http(s) link to the image.")
+
+        if self._session is None or self._session.closed:
+            self._session = safe_http.create_session(aiohttp.ClientTimeout(total=30))
+
+        try:
+            async with safe_http.request(self._session, "GET", image_url) as response:
+                if response.status != 200:
+                    raise ImageError(f"Couldn't download the image (HTTP {response.status}).")
+                if response.content_length and response.content_length > IMAGE_MAX_DOWNLOAD_BYTES:
+                    raise ImageError(f"The image is too large (max {IMAGE_MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB).")
+
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    data.extend(chunk)
+                    if len(data) > IMAGE_MAX_DOWNLOAD_BYTES:
+                        raise ImageError(f"The image is too large (max {IMAGE_MAX_DOWNLOAD_BYTES // (1024 * 1024)} MB).")
+                return bytes(data)
+        except safe_http.UnsafeURLError as e:
+            raise ImageError(str(e))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ImageError(f"Couldn't download the image: {e}")
@@ -0,0 +1,155 @@
+"""
+Image Validator - Checks that an image URL will render before it costs a post
+
+A HEAD request (or a one-byte ranged GET for hosts that don't answer HEAD)
+is enough to see the content type and size. Verdicts are cached per URL, so a
+saved template that is re-posted every day is only checked once per TTL.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+import aiohttp
+
+from utils import safe_http
+
+# Discord won't embed images larger than this
+IMAGE_CHECK_MAX_BYTES = 25 * 1024 * 1024
+# How long a good verdict is trusted
+IMAGE_CHECK_TTL = 6 * 3600.0
+# How long a bad verdict is trusted (the host may just have been down)
+IMAGE_CHECK_FAILED_TTL = 600.0
+# Maximum number of URLs kept
+IMAGE_CHECK_MAX_SIZE = 2048
+# Per-request timeout
+IMAGE_CHECK_TIMEOUT_SECONDS = 10
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCheck(NamedTuple):
+    """Verdict for one image URL"""
+
+    ok: bool
+    reason: Optional[str] = None
+
+
+class _Entry:
+    """A cached verdict and when it expires"""
+
+    __slots__ = ("check", "expires_at")
+
+    def __init__(self, check: ImageCheck, expires_at: float):
+        self.check = check
+        self.expires_at = expires_at
+
+
+class ImageValidator:
+    """Cached pre-flight checks of image URLs"""
+
+    def __init__(
+        self,
+        ttl: float = IMAGE_CHECK_TTL,
+        failed_ttl: float = IMAGE_CHECK_FAILED_TTL,
+        max_size: int = IMAGE_CHECK_MAX_SIZE
+    ):
+        self.ttl = ttl
+        self.failed_ttl = failed_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # URL -> in-flight check shared by everyone asking about that URL
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    async def check(self, image_url: str) -> ImageCheck:
+        """Whether Discord should be able to show the image at this URL"""
+        entry = self._entries.get(image_url)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(image_url)
+                return entry.check
+            del self._entries[image_url]
+
+        self.misses += 1
+        future = self._inflight.get(image_url)
+        if future is None:
+            future = asyncio.ensure_future(self._check(image_url))
+            self._inflight[image_url] = future
+        # Shield so one cancelled caller doesn't cancel the check for the others
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of cache counters"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def close(self) -> None:
+        """Close the HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _check(self, image_url: str) -> ImageCheck:
+        """Run the check and cache the verdict"""
+        try:
+            check = await self._request(image_url)
+        except safe_http.UnsafeURLError as e:
+            check = ImageCheck(False, str(e))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            check = ImageCheck(False, f"Couldn't reach the image: {e}")
+        except Exception as e:
+            logger.error(f"Error checking image {image_url}: {e}")
+            check = ImageCheck(False, "Couldn't check the image.")
+        finally:
+            self._inflight.pop(image_url, None)
+
+        ttl = self.ttl if check.ok else self.failed_ttl
+        self._entries[image_url] = _Entry(check, time.monotonic() + ttl)
+        self._entries.move_to_end(image_url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return check
+
+    async def _request(self, image_url: str) -> ImageCheck:
+        if not image_url.startswith(("http://", "https://")):
+            return ImageCheck(False, "Please provide a direct http(s) link to the image.")
+
+        if self._session is None or self._session.closed:
+            self._session = safe_http.create_session(
+                aiohttp.ClientTimeout(total=IMAGE_CHECK_TIMEOUT_SECONDS),
+                limit=20
+            )
+
+        # safe_http only connects to public addresses, on every redirect hop too
+        async with safe_http.request(self._session, "HEAD", image_url) as response:
+            status = response.status
+            content_type = response.content_type
+            size = response.content_length
+
+        if status >= 400 or not content_type or content_type == "application/octet-stream":
+            # Some hosts don't answer HEAD properly - ask for the first byte instead
+            async with safe_http.request(self._session, "GET", image_url, headers={"Range": "bytes=0-0"}) as response:
+                status = response.status
+                content_type = response.content_type
+                size = response.content_length
+                content_range = response.headers.get("Content-Range", "")
+                if status == 206 and "/" in content_range:
+                    total = content_range.rsplit("/", 1)[1]
+                    size = int(total) if total.isdigit() else None
+
+        if status >= 400:
+            return ImageCheck(False, f"Couldn't load the image (HTTP {status}).")
+        if not content_type.startswith("image/"):
+            return ImageCheck(False, "The link doesn't point to an image.")
+        if size and size > IMAGE_CHECK_MAX_BYTES:
+            return ImageCheck(False, f"The image is too large (max {IMAGE_CHECK_MAX_BYTES // (1024 * 1024)} MB).")
+        return ImageCheck(True)
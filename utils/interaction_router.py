@@ -0,0 +1,129 @@
+"""
+Interaction Router - One InteractionCreateEvent listener for every component and modal handler
+
+Handlers register the custom_id prefix they own (e.g. "recruitment_modal_") and
+the router finds the right one with a dict lookup, instead of every extension
+listening to every interaction and running its own startswith chain.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import hikari
+
+from utils.metrics import ERRORS_TOTAL, INTERACTION_ACK_SECONDS, INTERACTION_HANDLER_SECONDS
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[hikari.PartialInteraction], Awaitable[None]]
+
+
+class RouteStats:
+    """Call count and latency of one route"""
+
+    __slots__ = ("calls", "errors", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, failed: bool) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+class InteractionRouter:
+    """Routes component and modal interactions to handlers by custom_id prefix"""
+
+    def __init__(self):
+        # (interaction type, prefix) -> handler
+        self._routes: Dict[Tuple[Type[hikari.PartialInteraction], str], Handler] = {}
+        # Prefixes per interaction type, longest first, for custom_ids that don't end in "_<id>"
+        self._prefixes: Dict[Type[hikari.PartialInteraction], list] = {}
+        self.stats: Dict[str, RouteStats] = {}
+
+    def route(self, prefix: str, interaction_type: Type[hikari.PartialInteraction] = hikari.ComponentInteraction):
+        """Decorator registering a handler for custom_ids starting with `prefix`"""
+
+        def decorator(handler: Handler) -> Handler:
+            self.add_route(prefix, handler, interaction_type)
+            return handler
+
+        return decorator
+
+    def add_route(
+        self,
+        prefix: str,
+        handler: Handler,
+        interaction_type: Type[hikari.PartialInteraction] = hikari.ComponentInteraction
+    ) -> None:
+        """Register (or replace, e.g. on extension reload) the handler for a prefix"""
+        self._routes[(interaction_type, prefix)] = handler
+        prefixes = self._prefixes.setdefault(interaction_type, [])
+        if prefix not in prefixes:
+            prefixes.append(prefix)
+            prefixes.sort(key=len, reverse=True)
+        self.stats.setdefault(prefix, RouteStats())
+
+    def resolve(self, interaction: hikari.PartialInteraction) -> Tuple[Optional[str], Optional[Handler]]:
+        """Find the (prefix, handler) for an interaction"""
+        custom_id = getattr(interaction, "custom_id", None)
+        if not custom_id:
+            return None, None
+
+        interaction_type = type(interaction)
+        for registered_type in self._prefixes:
+            if isinstance(interaction, registered_type):
+                interaction_type = registered_type
+                break
+        else:
+            return None, None
+
+        # Fast path - our custom_ids are "<prefix><user id>"
+        head, separator, _ = custom_id.rpartition("_")
+        if separator:
+            prefix = head + separator
+            handler = self._routes.get((interaction_type, prefix))
+            if handler is not None:
+                return prefix, handler
+
+        # Fall back to the longest registered prefix
+        for prefix in self._prefixes[interaction_type]:
+            if custom_id.startswith(prefix):
+                return prefix, self._routes[(interaction_type, prefix)]
+        return None, None
+
+    async def dispatch(self, interaction: hikari.PartialInteraction) -> None:
+        """Run the handler for an interaction, if any, and record its latency"""
+        prefix, handler = self.resolve(interaction)
+        if handler is None:
+            return
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            await handler(interaction)
+        except Exception as e:
+            failed = True
+            ERRORS_TOTAL.inc(source="interaction")
+            logger.error(f"Error handling interaction {prefix}: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats[prefix].record(elapsed, failed)
+            INTERACTION_HANDLER_SECONDS.observe(elapsed, route=prefix)
+
+    def record_ack(self, interaction: hikari.PartialInteraction) -> None:
+        """Call right after the initial response - records how long the user waited for it"""
+        prefix, _ = self.resolve(interaction)
+        waited = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+        INTERACTION_ACK_SECONDS.observe(waited, route=prefix or "unrouted")
+
+
+# Shared router - extensions register routes on import, main.py wires up the listener
+router = InteractionRouter()
@@ -0,0 +1,260 @@
+"""
+Message Queue - Serialized, rate-limit aware writes to Discord channels
+
+Every write to a channel goes through that channel's queue, so concurrent callers
+(modal submits, scheduled posts) take turns instead of racing into 429s. Writes
+are paced to Discord's per-channel message limit, and keyed operations that are
+still waiting in the queue are coalesced into one.
+
+The pacing is a fixed 5 writes per 5 seconds rather than read from the response
+headers - hikari keeps its route buckets private and already waits on them
+itself, up to the bot's max_rate_limit (MAX_RATE_LIMIT_RETRY_SECONDS). Anything
+limited for longer raises RateLimitTooLongError and the write is dropped.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import hikari
+
+from utils.metrics import DISCORD_REST_SECONDS, ERRORS_TOTAL
+
+# Discord allows 5 message writes per 5 seconds in a channel
+CHANNEL_RATE_LIMIT = 5
+CHANNEL_RATE_PERIOD = 5.0
+# Longest rate limit hikari waits out (the GatewayBot's max_rate_limit) - writes limited for longer are dropped
+MAX_RATE_LIMIT_RETRY_SECONDS = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """A queued channel write"""
+
+    __slots__ = ("operation", "key", "cost", "route", "future", "enqueued_at")
+
+    def __init__(self, operation: Callable[[], Awaitable[Any]], key: Optional[str], cost: int, route: str):
+        self.operation = operation
+        self.key = key
+        self.cost = cost
+        self.route = route
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class _ChannelQueue:
+    """Pending writes and pacing state for one channel"""
+
+    def __init__(self):
+        self.requests = deque()
+        # Key -> request still waiting in the queue, for coalescing
+        self.keyed: Dict[str, _Request] = {}
+        # Monotonic times of recent writes, for pacing
+        self.sent = deque()
+        self.worker: Optional[asyncio.Task] = None
+
+
+class QueueMetrics:
+    """Counters for everything that went through the queue"""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def average_wait(self) -> float:
+        started = self.completed + self.failed
+        return self.total_wait / started if started else 0.0
+
+
+class MessageQueue:
+    """Per-channel send queue shared by everything that writes to recruitment channels"""
+
+    def __init__(
+        self,
+        rest: hikari.api.RESTClient,
+        rate_limit: int = CHANNEL_RATE_LIMIT,
+        rate_period: float = CHANNEL_RATE_PERIOD
+    ):
+        self.rest = rest
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.metrics = QueueMetrics()
+        self._channels: Dict[int, _ChannelQueue] = {}
+
+    async def create_message(self, channel: hikari.SnowflakeishOr[hikari.TextableChannel], **kwargs) -> hikari.Message:
+        """Queue a create_message call and wait for the created message"""
+        return await self.submit(channel, lambda: self.rest.create_message(channel, **kwargs), route="create_message")
+
+    async def edit_message(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.TextableChannel],
+        message: hikari.SnowflakeishOr[hikari.PartialMessage],
+        **kwargs
+    ) -> hikari.Message:
+        """Queue an edit_message call and wait for the edited message"""
+        return await self.submit(channel, lambda: self.rest.edit_message(channel, message, **kwargs), route="edit_message")
+
+    async def delete_message(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.TextableChannel],
+        message: hikari.SnowflakeishOr[hikari.PartialMessage]
+    ) -> None:
+        """Queue a delete_message call and wait for it to finish"""
+        await self.submit(channel, lambda: self.rest.delete_message(channel, message), route="delete_message")
+
+    def submit(
+        self,
+        channel: hikari.SnowflakeishOr[hikari.TextableChannel],
+        operation: Callable[[], Awaitable[Any]],
+        key: Optional[str] = None,
+        cost: int = 1,
+        route: str = "other"
+    ) -> asyncio.Future:
+        """
+        Queue a write for a channel
+
+        Args:
+            channel: The channel the write goes to
+            operation: Coroutine factory doing the actual REST call(s)
+            key: If a request with the same key is still waiting, it is replaced by this one
+                 and both callers get the same result
+            cost: Number of writes the operation makes, used for pacing
+            route: Name the call's latency is recorded under
+
+        Returns:
+            Future resolved with the operation's result - await it, or ignore it for fire-and-forget
+        """
+        channel_id = int(channel)
+        queue = self._channels.setdefault(channel_id, _ChannelQueue())
+        self.metrics.enqueued += 1
+
+        if key is not None and key in queue.keyed:
+            # Still waiting - run the newest operation in its place
+            pending = queue.keyed[key]
+            pending.operation = operation
+            pending.cost = cost
+            pending.route = route
+            self.metrics.coalesced += 1
+            return pending.future
+
+        request = _Request(operation, key, cost, route)
+        # Errors are logged by the worker, don't warn if nobody awaits a fire-and-forget write
+        request.future.add_done_callback(_consume_exception)
+        queue.requests.append(request)
+        if key is not None:
+            queue.keyed[key] = request
+
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._run(channel_id, queue))
+        return request.future
+
+    def depth(self, channel: Optional[hikari.SnowflakeishOr[hikari.TextableChannel]] = None) -> int:
+        """Number of writes waiting, for one channel or all of them"""
+        if channel is not None:
+            queue = self._channels.get(int(channel))
+            return len(queue.requests) if queue else 0
+        return sum(len(queue.requests) for queue in self._channels.values())
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of queue depth and wait-time metrics"""
+        return {
+            "depth": self.depth(),
+            "enqueued": self.metrics.enqueued,
+            "completed": self.metrics.completed,
+            "failed": self.metrics.failed,
+            "coalesced": self.metrics.coalesced,
+            "rate_limited": self.metrics.rate_limited,
+            "average_wait_seconds": self.metrics.average_wait,
+            "max_wait_seconds": self.metrics.max_wait,
+        }
+
+    async def close(self) -> None:
+        """Stop all workers, cancelling anything still queued or in flight"""
+        workers = []
+        for queue in self._channels.values():
+            if queue.worker and not queue.worker.done():
+                queue.worker.cancel()
+                workers.append(queue.worker)
+            while queue.requests:
+                request = queue.requests.popleft()
+                request.future.cancel()
+            queue.keyed.clear()
+        self._channels.clear()
+        # Workers cancel the request they were sending as they exit
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _run(self, channel_id: int, queue: _ChannelQueue) -> None:
+        """Drain one channel's queue in order, pacing writes to the channel rate limit"""
+        while queue.requests:
+            request = queue.requests[0]
+            await self._wait_for_capacity(queue, request.cost)
+
+            # Past this point the request can no longer be coalesced
+            queue.requests.popleft()
+            if request.key is not None and queue.keyed.get(request.key) is request:
+                del queue.keyed[request.key]
+
+            wait = time.monotonic() - request.enqueued_at
+            self.metrics.record_wait(wait)
+
+            started = time.perf_counter()
+            try:
+                result = await request.operation()
+            except asyncio.CancelledError:
+                # Queue closed mid-write - don't leave the caller waiting forever
+                request.future.cancel()
+                raise
+            except hikari.RateLimitTooLongError as e:
+                # Waiting would hold up every other write to the channel - give up on this one
+                self.metrics.rate_limited += 1
+                self.metrics.failed += 1
+                ERRORS_TOTAL.inc(source="discord")
+                logger.error(f"Channel {channel_id} rate limited for {e.retry_after:.1f}s, dropping queued write")
+                if not request.future.done():
+                    request.future.set_exception(e)
+                continue
+            except Exception as e:
+                self.metrics.failed += 1
+                ERRORS_TOTAL.inc(source="discord")
+                logger.error(f"Queued write to channel {channel_id} failed: {e}")
+                if not request.future.done():
+                    request.future.set_exception(e)
+                continue
+            finally:
+                DISCORD_REST_SECONDS.observe(time.perf_counter() - started, route=request.route)
+                now = time.monotonic()
+                queue.sent.extend([now] * request.cost)
+
+            self.metrics.completed += 1
+            if not request.future.done():
+                request.future.set_result(result)
+
+    async def _wait_for_capacity(self, queue: _ChannelQueue, cost: int) -> None:
+        """Sleep until the channel has room for `cost` more writes in the current period"""
+        cost = min(cost, self.rate_limit)
+        while True:
+            now = time.monotonic()
+            while queue.sent and now - queue.sent[0] >= self.rate_period:
+                queue.sent.popleft()
+            if len(queue.sent) + cost <= self.rate_limit:
+                return
+            await asyncio.sleep(self.rate_period - (now - queue.sent[0]))
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """Mark a future's exception as retrieved"""
+    if not future.cancelled():
+        future.exception()
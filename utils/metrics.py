@@ -0,0 +1,261 @@
+"""
+Metrics - Latency histograms and counters, served in the Prometheus text format
+
+Hot paths record into the module-level metrics below. Everything else that
+already keeps its own counters (queues, caches) is read through callbacks at
+scrape time. The endpoint is a small aiohttp server on METRICS_HOST:METRICS_PORT,
+started from main.py.
+"""
+
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+from pymongo import monitoring
+
+# Where the /metrics endpoint listens - set METRICS_PORT=0 to turn it off
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic count, optionally labelled"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Distribution of observed values (seconds), optionally labelled"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        # Label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block took"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            cumulative += counts[-1]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    """Values read from another object's stats at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str], callback: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.error(f"Failed to collect {self.name}: {e}")
+            return lines
+        for key, value in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric the bot exposes"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        # Component name -> its stats() method
+        self._stats: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self.register(CallbackGauge(
+            "recruit_component_stat",
+            "Counters and sizes reported by queues and caches",
+            ("component", "stat"),
+            self._collect_stats
+        ))
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_stats(self, component: str, stats: Callable[[], Dict[str, float]]) -> None:
+        """Expose a component's stats() dict as recruit_component_stat{component, stat}"""
+        self._stats[component] = stats
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _collect_stats(self) -> Dict[Tuple, float]:
+        values = {}
+        for component, stats in self._stats.items():
+            for stat, value in stats().items():
+                values[(component, stat)] = value
+        return values
+
+
+metrics = MetricsRegistry()
+
+INTERACTION_ACK_SECONDS = metrics.register(Histogram(
+    "recruit_interaction_ack_seconds",
+    "Time from an interaction being created to the bot acknowledging it",
+    ("route",)
+))
+INTERACTION_HANDLER_SECONDS = metrics.register(Histogram(
+    "recruit_interaction_handler_seconds",
+    "Time spent in a component or modal handler",
+    ("route",)
+))
+COC_FETCH_SECONDS = metrics.register(Histogram(
+    "recruit_coc_fetch_seconds",
+    "Clash of Clans API fetch time",
+    ("operation",)
+))
+MONGO_QUERY_SECONDS = metrics.register(Histogram(
+    "recruit_mongo_query_seconds",
+    "MongoDB command time",
+    ("collection", "operation")
+))
+DISCORD_REST_SECONDS = metrics.register(Histogram(
+    "recruit_discord_rest_seconds",
+    "Discord REST call time (excluding time spent queued)",
+    ("route",)
+))
+SCHEDULER_LAG_SECONDS = metrics.register(Histogram(
+    "recruit_scheduler_lag_seconds",
+    "Actual fire time minus scheduled time of auto-post jobs",
+    (),
+    LAG_BUCKETS
+))
+ERRORS_TOTAL = metrics.register(Counter(
+    "recruit_errors_total",
+    "Errors by where they happened",
+    ("source",)
+))
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Times every MongoDB command by collection and operation"""
+
+    def __init__(self):
+        # Request ID -> collection name, from the started event
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event)
+        ERRORS_TOTAL.inc(source="mongo")
+
+    def _record(self, event) -> None:
+        collection = self._collections.pop(event.request_id, "")
+        MONGO_QUERY_SECONDS.observe(
+            event.duration_micros / 1_000_000,
+            collection=collection,
+            operation=event.command_name
+        )
+
+
+class MetricsServer:
+    """Serves GET /metrics"""
+
+    def __init__(self, registry: MetricsRegistry = metrics, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        if not self.port:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+        except OSError as e:
+            logger.error(f"Failed to start metrics server on {self.host}:{self.port}: {e}")
+            await self.stop()
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, _: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
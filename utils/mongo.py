@@ -1,10 +1,205 @@
-from pymongo import AsyncMongoClient
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId, Timestamp
+from pymongo import AsyncMongoClient, ASCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Database holding every collection the bot uses
+DATABASE_NAME = "settings"
+
+# Fields of a recruit_data document needed to show or prefill a saved post
+RECRUIT_TEMPLATE_PROJECTION = {
+    "clan_tag": 1,
+    "description": 1,
+    "image_url": 1,
+    "discord_link": 1,
+    "posted_at": 1,
+    "message_id": 1,
+    "channel_id": 1,
+}
+
+# Fields of a recruit_data document needed to render a post
+RECRUIT_POST_PROJECTION = {
+    "clan_tag": 1,
+    "description": 1,
+    "image_url": 1,
+    "discord_link": 1,
+}
+
+# Fields of an auto_recruit document needed to post it
+AUTO_POST_PROJECTION = {
+    "discord_id": 1,
+    "clan_tag": 1,
+    "channel_id": 1,
+    "enabled": 1,
+}
+
+# Capped collections created at startup: name -> (max bytes, max documents)
+CAPPED_COLLECTIONS = {
+    "scheduler_events": (8 * 1024 * 1024, 50000),
+}
+
+# Indexes created at startup, per collection
+INDEXES = {
+    "auto_recruit": [
+        IndexModel([("enabled", ASCENDING)], name="enabled"),
+        IndexModel([("discord_id", ASCENDING)], name="discord_id"),
+        IndexModel([("clan_tag", ASCENDING)], name="clan_tag"),
+        IndexModel([("post_time", ASCENDING), ("timezone", ASCENDING)], name="post_time_timezone"),
+    ],
+    "recruit_data": [
+        # Cooldown warm-up query
+        IndexModel([("posted_at", ASCENDING)], name="posted_at"),
+    ],
+    "upload_cache": [
+        # Clearing entries when an image is deleted
+        IndexModel([("public_id", ASCENDING)], name="public_id"),
+    ],
+    "scheduler_events": [
+        # Lag summaries over a time range
+        IndexModel([("type", ASCENDING), ("scheduled_at", ASCENDING)], name="type_scheduled_at"),
+    ],
+    "button_store": [
+        # MongoDB drops sessions once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+def ensure_utc_aware(dt):
+    """Ensure a datetime is timezone-aware in UTC (MongoDB returns naive UTC datetimes)"""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        # Naive datetime - assume it's UTC
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def same_clan_tag(a: str, b: str) -> bool:
+    """Compare clan tags ignoring case, whitespace and the leading #"""
+    return str(a).strip().upper().lstrip("#") == str(b).strip().upper().lstrip("#")
 
 
 class MongoClient(AsyncMongoClient):
     def __init__(self, uri: str, **kwargs):
         super().__init__(host=uri, **kwargs)
-        self.__settings = self.get_database("settings")
+        self.__settings = self.get_database(DATABASE_NAME)
         self.button_store = self.__settings.get_collection("button_store")
         self.recruit_data = self.__settings.get_collection("recruit_data")
-        self.auto_recruit = self.__settings.get_collection("auto_recruit")
\ No newline at end of file
+        self.auto_recruit = self.__settings.get_collection("auto_recruit")
+        self.bot_state = self.__settings.get_collection("bot_state")
+        self.upload_cache = self.__settings.get_collection("upload_cache")
+        self.scheduler_events = self.__settings.get_collection("scheduler_events")
+
+    async def ensure_schema(self) -> None:
+        """Create the capped collections and indexes the bot relies on (no-op if they already exist)"""
+        try:
+            existing = set(await self.__settings.list_collection_names())
+            for collection_name, (size, max_documents) in CAPPED_COLLECTIONS.items():
+                if collection_name not in existing:
+                    await self.__settings.create_collection(collection_name, capped=True, size=size, max=max_documents)
+        except Exception as e:
+            logger.error(f"Failed to create capped collections: {e}")
+
+        for collection_name, indexes in INDEXES.items():
+            try:
+                await self.__settings.get_collection(collection_name).create_indexes(indexes)
+            except Exception as e:
+                # Queries still work without the index, just slower
+                logger.error(f"Failed to create indexes on {collection_name}: {e}")
+
+    async def get_cluster_time(self) -> Optional[Timestamp]:
+        """The cluster's current operation time, to start a change stream from (None if not a replica set)"""
+        try:
+            response = await self.__settings.command("ping")
+        except Exception as e:
+            logger.error(f"Failed to read cluster time: {e}")
+            return None
+        return response.get("operationTime")
+
+    async def get_recruit_template(self, discord_id: str) -> Optional[dict]:
+        """A user's saved recruitment post, without bookkeeping fields"""
+        return await self.recruit_data.find_one({"_id": str(discord_id)}, RECRUIT_TEMPLATE_PROJECTION)
+
+    async def get_posted_at(self, discord_id: str) -> Optional[datetime]:
+        """When the user last posted, or None"""
+        data = await self.recruit_data.find_one({"_id": str(discord_id)}, {"posted_at": 1})
+        return data.get("posted_at") if data else None
+
+    async def get_recruit_posts(self, discord_ids: Iterable[str]) -> Dict[str, dict]:
+        """Render fields of several users' saved posts, keyed by Discord user ID"""
+        cursor = self.recruit_data.find({"_id": {"$in": list(discord_ids)}}, RECRUIT_POST_PROJECTION)
+        return {data["_id"]: data async for data in cursor}
+
+    async def get_auto_posts(self, doc_ids: Iterable) -> Dict[str, dict]:
+        """Posting fields of several auto_recruit documents, keyed by str(_id)"""
+        cursor = self.auto_recruit.find({"_id": {"$in": list(doc_ids)}}, AUTO_POST_PROJECTION)
+        return {str(data["_id"]): data async for data in cursor}
+
+    async def get_schedules(self, projection: dict, enabled_only: bool = False) -> List[dict]:
+        """auto_recruit documents, reading only the given fields"""
+        query = {"enabled": True} if enabled_only else {}
+        return await self.auto_recruit.find(query, projection).to_list(None)
+
+    async def claim_auto_posts(self, doc_ids: Iterable, owner: str, claim_seconds: float) -> Set[str]:
+        """
+        Claim auto_recruit documents for posting for claim_seconds
+
+        Each document is claimed atomically, so two instances posting the same run
+        can't both get it. Claim times use the server's clock. Returns str(_id) of
+        the documents this call claimed.
+        """
+        doc_ids = list(doc_ids)
+        claim_id = ObjectId()
+        await self.auto_recruit.update_many(
+            {
+                "_id": {"$in": doc_ids},
+                "$or": [{"claimed_until": None}, {"$expr": {"$lt": ["$claimed_until", "$$NOW"]}}],
+            },
+            [{"$set": {
+                "claimed_until": {"$add": ["$$NOW", int(claim_seconds * 1000)]},
+                "claimed_by": owner,
+                "claim_id": claim_id,
+            }}]
+        )
+        cursor = self.auto_recruit.find({"_id": {"$in": doc_ids}, "claim_id": claim_id}, {"_id": 1})
+        return {str(data["_id"]) async for data in cursor}
+
+    async def release_auto_posts(self, doc_ids: Iterable, owner: str) -> None:
+        """Drop owner's claim on auto_recruit documents, so a failed post can be retried straight away"""
+        await self.auto_recruit.update_many(
+            {"_id": {"$in": list(doc_ids)}, "claimed_by": owner},
+            {"$unset": {"claimed_until": "", "claimed_by": "", "claim_id": ""}}
+        )
+
+    async def get_last_auto_posts(self, discord_id: str, clan_tag: Optional[str] = None) -> List[Tuple[int, int]]:
+        """
+        (channel_id, message_id) of the latest auto-post of each of a user's schedules
+
+        With clan_tag, only schedules that post that clan - their own clan_tag matches
+        or is unset, so they post the user's saved clan.
+        """
+        cursor = self.auto_recruit.find(
+            {"discord_id": discord_id, "last_message_id": {"$ne": None}},
+            {"channel_id": 1, "last_message_id": 1, "clan_tag": 1}
+        )
+        return [
+            (int(data["channel_id"]), int(data["last_message_id"]))
+            async for data in cursor
+            if data.get("channel_id")
+            and (clan_tag is None or not data.get("clan_tag") or same_clan_tag(data["clan_tag"], clan_tag))
+        ]
+
+    async def get_info_message(self) -> Optional[Tuple[int, int]]:
+        """(channel_id, message_id) of the recruitment info message, if one was recorded"""
+        data = await self.recruit_data.find_one(
+            {"_id": "recruitment_info_message"},
+            {"channel_id": 1, "message_id": 1}
+        )
+        if data and "message_id" in data and "channel_id" in data:
+            return data["channel_id"], data["message_id"]
+        return None
@@ -0,0 +1,162 @@
+"""
+Recruitment Info Message - The "how to post" message kept at the bottom of recruitment channels
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict
+
+import hikari
+from pymongo import ReplaceOne
+
+from utils.constants import GREEN_ACCENT
+from utils.message_queue import MessageQueue
+from utils.mongo import MongoClient
+from utils.write_buffer import WriteBuffer
+
+from hikari.impl import (
+    ContainerComponentBuilder as Container,
+    TextDisplayComponentBuilder as Text,
+    SeparatorComponentBuilder as Separator,
+    MediaGalleryComponentBuilder as Media,
+    MediaGalleryItemBuilder as MediaItem,
+)
+
+# Queue key for info message refreshes - a refresh still waiting in the queue absorbs newer ones
+INFO_MESSAGE_KEY = "recruitment_info_message"
+
+# Re-post the info message once the channel has been quiet this long
+INFO_QUIET_SECONDS = 15.0
+# ...but never hold it back longer than this during a long burst
+INFO_MAX_DELAY_SECONDS = 120.0
+
+logger = logging.getLogger(__name__)
+
+
+def build_info_container() -> Container:
+    """Create the recruitment info container"""
+    return Container(
+        accent_color=GREEN_ACCENT,
+        components=[
+            Text(content="## 📢 **Jo Nation Recruitment Post Process**"),
+            Separator(divider=True),
+            Text(content=(
+                "Our recruitment channels use the **@Jo Nation Helper** to post your recruitment ads. "
+                "This ensures they match our post guidelines. To post, run command `/post-clan`. "
+                "Then, add your clan tag, description, and an optional image. You can also save this info for next time. "
+                "Remember, you can post once every 12 hours."
+            )),
+            Separator(divider=True),
+            Media(items=[MediaItem(media="https://res.cloudinary.com/dxmtzuomk/image/upload/v1753197822/misc_images/image.jpg")])
+        ]
+    )
+
+
+class InfoMessageManager:
+    """
+    Keeps the recruitment info message at the bottom of the channel
+
+    Posts only mark the channel as needing a refresh. The info message is re-posted
+    once the channel has been quiet for `quiet_seconds` (or after `max_delay_seconds`
+    during a long burst), and the current message ID is cached so the tracking
+    document is only read once.
+    """
+
+    def __init__(
+        self,
+        queue: MessageQueue,
+        mongo: MongoClient,
+        writes: WriteBuffer,
+        quiet_seconds: float = INFO_QUIET_SECONDS,
+        max_delay_seconds: float = INFO_MAX_DELAY_SECONDS
+    ):
+        self.queue = queue
+        self.mongo = mongo
+        self.writes = writes
+        self.quiet_seconds = quiet_seconds
+        self.max_delay_seconds = max_delay_seconds
+        # Cached tracking document - (channel_id, message_id) of the current info message
+        self._current = None
+        self._loaded = False
+        # Channel ID -> pending debounce task, and when the channel was first marked
+        self._pending: Dict[int, asyncio.Task] = {}
+        self._first_marked: Dict[int, float] = {}
+
+    def touch(self, channel_id: int) -> None:
+        """Mark a channel as having a new post - the info message is re-posted after the burst"""
+        channel_id = int(channel_id)
+        loop = asyncio.get_running_loop()
+        first_marked = self._first_marked.setdefault(channel_id, loop.time())
+
+        pending = self._pending.get(channel_id)
+        if pending and not pending.done():
+            pending.cancel()
+
+        # Wait for a quiet window, but never past the max delay from the first post in the burst
+        delay = min(self.quiet_seconds, max(0.0, first_marked + self.max_delay_seconds - loop.time()))
+        self._pending[channel_id] = asyncio.create_task(self._refresh_later(channel_id, delay))
+
+    async def flush(self) -> None:
+        """Re-post immediately for every channel still waiting (used on shutdown)"""
+        channels = list(self._pending)
+        for channel_id in channels:
+            self._pending.pop(channel_id).cancel()
+            self._first_marked.pop(channel_id, None)
+        for channel_id in channels:
+            try:
+                await self.refresh(channel_id)
+            except Exception as e:
+                logger.error(f"Error posting recruitment info message in channel {channel_id}: {e}")
+
+    def refresh(self, channel_id: int) -> asyncio.Future:
+        """Queue moving the recruitment info message to the bottom of the channel"""
+        # Delete + create counts as two writes against the channel
+        return self.queue.submit(channel_id, lambda: self._refresh(channel_id), key=INFO_MESSAGE_KEY, cost=2, route="info_message")
+
+    async def _refresh_later(self, channel_id: int, delay: float) -> None:
+        """Debounce task - re-post once the channel has been quiet"""
+        await asyncio.sleep(delay)
+        if self._pending.get(channel_id) is asyncio.current_task():
+            del self._pending[channel_id]
+        self._first_marked.pop(channel_id, None)
+        try:
+            await self.refresh(channel_id)
+        except Exception as e:
+            logger.error(f"Error posting recruitment info message in channel {channel_id}: {e}")
+
+    async def _refresh(self, channel_id: int) -> hikari.Message:
+        """Delete the old info message, post a new one and record its ID"""
+        if not self._loaded:
+            self._current = await self.mongo.get_info_message()
+            self._loaded = True
+
+        # Delete the existing recruitment info message
+        if self._current:
+            try:
+                await self.queue.rest.delete_message(channel=self._current[0], message=self._current[1])
+            except Exception:
+                # Ignore errors if message doesn't exist
+                pass
+            self._current = None
+
+        # Send recruitment info message
+        info_message = await self.queue.rest.create_message(
+            channel=channel_id,
+            components=[build_info_container()]
+        )
+        self._current = (channel_id, info_message.id)
+
+        # Store the message ID for the next restart - it's cached in memory until then,
+        # so the write can go out with the next batch
+        self.writes.add("recruit_data", ReplaceOne(
+            {"_id": "recruitment_info_message"},
+            {
+                "_id": "recruitment_info_message",
+                "message_id": info_message.id,
+                "channel_id": channel_id,
+                "updated_at": datetime.now(timezone.utc)
+            },
+            upsert=True
+        ))
+        return info_message
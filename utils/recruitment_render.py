@@ -0,0 +1,197 @@
+"""
+Recruitment Post Rendering - Builds the clan recruitment container for every post path
+
+/post-clan, /post-edit and scheduled posts all render the same container. The
+clan is reduced to a hashable snapshot first, and every block except the footer
+is memoized on (snapshot, post data), so re-rendering an unchanged clan only
+builds the footer timestamp.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Tuple
+
+import coc
+
+from utils.constants import CYAN_ACCENT
+
+from hikari.impl import (
+    ContainerComponentBuilder as Container,
+    TextDisplayComponentBuilder as Text,
+    SeparatorComponentBuilder as Separator,
+    MediaGalleryComponentBuilder as Media,
+    MediaGalleryItemBuilder as MediaItem,
+    MessageActionRowBuilder as ActionRow,
+    LinkButtonBuilder as LinkButton,
+    SectionComponentBuilder as Section,
+    ThumbnailComponentBuilder as Thumbnail,
+)
+
+# Maximum number of rendered static blocks kept
+RENDER_CACHE_MAX_SIZE = 256
+
+
+class ClanSnapshot(NamedTuple):
+    """The clan fields a recruitment post shows, normalized and hashable"""
+
+    name: str
+    tag: str
+    level: int
+    capital_hall: int
+    points: int
+    member_count: int
+    location: str
+    language: str
+    badge_url: Optional[str]
+    war_league: str
+    war_wins: int
+    war_frequency: str
+    war_win_streak: int
+    link: str
+
+    @classmethod
+    def from_clan(cls, clan: coc.Clan) -> "ClanSnapshot":
+        """Normalize a coc.Clan, resolving every fallback once"""
+        # Calculate capital hall level
+        if clan.capital_districts:
+            peak = max(d.hall_level for d in clan.capital_districts)
+        else:
+            peak = 0
+
+        # Use the clan's share link if available
+        clan_tag_clean = clan.tag.replace("#", "")
+        share_link = getattr(clan, "share_link", None)
+        link = share_link or f"https://link.clashofclans.com/en?action=OpenClanProfile&tag={clan_tag_clean}"
+
+        chat_language = getattr(clan, "chat_language", None)
+        badge = getattr(clan, "badge", None)
+
+        return cls(
+            name=clan.name,
+            tag=clan.tag,
+            level=clan.level,
+            capital_hall=peak,
+            points=clan.points,
+            member_count=clan.member_count,
+            location=clan.location.name if clan.location else "International",
+            language=chat_language.name if chat_language else "Unknown",
+            badge_url=badge.url if badge else None,
+            war_league=clan.war_league.name if clan.war_league else "Unranked",
+            war_wins=clan.war_wins,
+            war_frequency=getattr(clan, "war_frequency", None) or "Always",
+            war_win_streak=getattr(clan, "war_win_streak", 0) or 0,
+            link=link,
+        )
+
+
+# (snapshot, message, image_url, discord_link) -> static component builders
+_static_cache: "OrderedDict[tuple, Tuple]" = OrderedDict()
+
+
+def render_recruitment_post(
+    clan: ClanSnapshot,
+    recruitment_message: str,
+    image_url: Optional[str] = None,
+    discord_link: Optional[str] = None,
+    posted_by_id: Optional[int] = None,
+    edited: bool = False
+) -> list:
+    """Create the recruitment message components"""
+    static_blocks = _static_blocks(clan, recruitment_message, image_url or None, discord_link or None)
+
+    # Only the footer changes between renders of the same post
+    timestamp = int(datetime.now(timezone.utc).timestamp())
+    posted_by = f"Posted by <@{posted_by_id}>" if posted_by_id else "Posted"
+    footer = f"\n-# {posted_by} • <t:{timestamp}:f>"
+    if edited:
+        footer += " (edited)"
+
+    container = Container(
+        accent_color=CYAN_ACCENT,
+        components=[*static_blocks, Text(content=footer)]
+    )
+    return [container]
+
+
+def _static_blocks(
+    clan: ClanSnapshot,
+    recruitment_message: str,
+    image_url: Optional[str],
+    discord_link: Optional[str]
+) -> Tuple:
+    """Build (or reuse) every block above the footer"""
+    key = (clan, recruitment_message, image_url, discord_link)
+    blocks = _static_cache.get(key)
+    if blocks is not None:
+        _static_cache.move_to_end(key)
+        return blocks
+
+    blocks = [
+        # Title
+        Text(content=f"## ⚔️ **{clan.name} Recruitment**"),
+        Separator(divider=True),
+
+        # Clan Basic Info Section with Badge
+        Section(
+            components=[
+                Text(content=(
+                    f"📌 **Clan Tag:** `{clan.tag}`\n"
+                    f"🎖️ **Clan Level:** {clan.level}\n"
+                    f"⛰️ **Capital Hall:** Level {clan.capital_hall}\n"
+                    f"🏆 **Trophies:** {clan.points:,}\n"
+                    f"👥 **Members:** {clan.member_count}\n"
+                    f"🌐 **Location:** {clan.location}\n"
+                    f"🗣️ **Language:** {clan.language}"
+                ))
+            ],
+            accessory=Thumbnail(media=clan.badge_url) if clan.badge_url else None
+        ),
+
+        Separator(divider=True),
+
+        # Clan Stats
+        Text(content=(
+            f"## 📊 **War Information**\n"
+            f"• **War League:** {clan.war_league}\n"
+            f"• **War Wins:** {clan.war_wins}\n"
+            f"• **War Frequency:** {clan.war_frequency}\n"
+            f"• **Win Streak:** {clan.war_win_streak}"
+        )),
+
+        Separator(divider=True),
+
+        # Recruitment Message
+        Text(content="## 📋 **About Our Clan**"),
+        Text(content=recruitment_message),
+    ]
+
+    # Add image if provided
+    if image_url:
+        blocks.append(Separator(divider=True))
+        blocks.append(Media(items=[MediaItem(media=image_url)]))
+
+    # Add buttons
+    button_row = ActionRow(components=[])
+    button_row.add_component(
+        LinkButton(
+            url=clan.link,
+            label="📱 Apply In-Game"
+        )
+    )
+
+    if discord_link:
+        button_row.add_component(
+            LinkButton(
+                url=discord_link,
+                label="💬 Join Discord"
+            )
+        )
+
+    blocks.append(button_row)
+    blocks.append(Separator(divider=True))
+
+    blocks = tuple(blocks)
+    _static_cache[key] = blocks
+    while len(_static_cache) > RENDER_CACHE_MAX_SIZE:
+        _static_cache.popitem(last=False)
+    return blocks
@@ -0,0 +1,121 @@
+"""
+Safe HTTP - Fetching user-supplied URLs without reaching internal addresses
+
+Image links come from users, so the bot must not become a way to reach the
+metrics endpoint, the cloud metadata service or hosts on the LAN. Sessions from
+create_session() only connect to globally routable addresses: hostnames are
+resolved and filtered by PublicResolver (so a DNS answer can't be swapped
+between check and connect), IP literals are checked before each request, and
+redirects are followed by hand so every hop goes through the same checks.
+"""
+
+import ipaddress
+import logging
+import socket
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+from yarl import URL
+
+# Redirects followed before giving up
+MAX_REDIRECTS = 5
+# Statuses whose Location header is followed
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+logger = logging.getLogger(__name__)
+
+
+class UnsafeURLError(aiohttp.ClientError):
+    """The URL points somewhere the bot must not connect to"""
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable (not loopback, private, link-local, ...)"""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_url(url: URL) -> None:
+    """
+    Reject URLs that aren't http(s) or point at a non-public IP literal
+
+    Raises:
+        UnsafeURLError: If the URL isn't allowed
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise UnsafeURLError("Only http(s) links are allowed.")
+    try:
+        ipaddress.ip_address(url.host.split("%", 1)[0])
+    except ValueError:
+        # A hostname - PublicResolver checks what it resolves to
+        return
+    if not is_public_address(url.host):
+        raise UnsafeURLError("Links to private or local addresses aren't allowed.")
+
+
+class PublicResolver(AbstractResolver):
+    """Resolves hostnames and drops every non-public address from the answer"""
+
+    def __init__(self):
+        self._resolver = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET) -> List[ResolveResult]:
+        results = await self._resolver.resolve(host, port, family)
+        public = [result for result in results if is_public_address(result["host"])]
+        if not public:
+            raise UnsafeURLError("Links to private or local addresses aren't allowed.")
+        return public
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+def create_session(timeout: aiohttp.ClientTimeout, limit: int = 100, ttl_dns_cache: int = 10) -> aiohttp.ClientSession:
+    """A session that can only connect to public addresses - use it with request()"""
+    return aiohttp.ClientSession(
+        timeout=timeout,
+        connector=aiohttp.TCPConnector(limit=limit, ttl_dns_cache=ttl_dns_cache, resolver=PublicResolver())
+    )
+
+
+@asynccontextmanager
+async def request(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    max_redirects: int = MAX_REDIRECTS,
+    **kwargs
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    Make a request, following redirects by hand so each hop is checked
+
+    Raises:
+        UnsafeURLError: If the URL or a redirect target isn't allowed
+        aiohttp.TooManyRedirects: If there are more than max_redirects redirects
+    """
+    target = URL(url)
+    for _ in range(max_redirects + 1):
+        check_url(target)
+        response = await session.request(method, target, allow_redirects=False, **kwargs)
+        location = response.headers.get("Location")
+        if response.status not in REDIRECT_STATUSES or not location:
+            try:
+                yield response
+            finally:
+                response.release()
+            return
+
+        response.release()
+        target = response.url.join(URL(location))
+        if response.status == 303:
+            method = "GET"
+
+    raise aiohttp.TooManyRedirects(response.request_info, response.history)
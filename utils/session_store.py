@@ -0,0 +1,171 @@
+"""
+Session Store - Short-lived per-user state between a slash command, its buttons and its modal
+
+Sessions expire after a TTL and the store holds at most `max_size` of them, so
+abandoned modals don't pile up. Sessions only hold the user's own state - the
+bot, Mongo and coc clients are looked up from bot_data when needed. An optional
+Mongo tier (the button_store collection) lets sessions survive restarts and be
+picked up by another process.
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from utils import bot_data
+
+# How long a session lives after it was last stored
+SESSION_TTL_SECONDS = 900
+# Maximum sessions kept in memory per store
+SESSION_MAX_SIZE = 1000
+# Also keep sessions in MongoDB (button_store) so they survive restarts
+SESSION_STORE_MONGO = os.getenv("SESSION_STORE_MONGO", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """A user's in-progress post or edit"""
+
+    __slots__ = ("user_id", "save", "stored_data", "channel_id", "expires_at")
+
+    def __init__(
+        self,
+        user_id: int,
+        save: bool = False,
+        stored_data: Optional[dict] = None,
+        channel_id: Optional[int] = None,
+        expires_at: float = 0.0
+    ):
+        self.user_id = user_id
+        self.save = save
+        self.stored_data = stored_data
+        self.channel_id = channel_id
+        self.expires_at = expires_at
+
+
+class SessionStore:
+    """TTL + LRU bounded session store, optionally backed by MongoDB"""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float = SESSION_TTL_SECONDS,
+        max_size: int = SESSION_MAX_SIZE,
+        persist: bool = SESSION_STORE_MONGO
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self.persist = persist
+        self._sessions: "OrderedDict[int, Session]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    async def put(
+        self,
+        user_id: int,
+        save: bool = False,
+        stored_data: Optional[dict] = None,
+        channel_id: Optional[int] = None
+    ) -> Session:
+        """Create or replace a user's session"""
+        session = Session(user_id, save, stored_data, channel_id, time.time() + self.ttl)
+        self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        self._evict()
+
+        if self.persist:
+            try:
+                await bot_data.data["mongo"].button_store.replace_one(
+                    {"_id": self._key(user_id)},
+                    {
+                        "_id": self._key(user_id),
+                        "type": "session",
+                        "save": save,
+                        "stored_data": stored_data,
+                        "channel_id": channel_id,
+                        "expires_at": datetime.fromtimestamp(session.expires_at, timezone.utc)
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                # Memory tier still works - the session just won't survive a restart
+                logger.error(f"Failed to persist session {self._key(user_id)}: {e}")
+        return session
+
+    async def get(self, user_id: int) -> Optional[Session]:
+        """Get a user's session if it hasn't expired"""
+        session = self._sessions.get(user_id)
+        if session is not None:
+            if session.expires_at > time.time():
+                self._sessions.move_to_end(user_id)
+                return session
+            del self._sessions[user_id]
+            return None
+
+        if not self.persist:
+            return None
+
+        # Started before a restart or on another process
+        try:
+            data = await bot_data.data["mongo"].button_store.find_one({
+                "_id": self._key(user_id),
+                "expires_at": {"$gt": datetime.now(timezone.utc)}
+            })
+        except Exception as e:
+            logger.error(f"Failed to load session {self._key(user_id)}: {e}")
+            return None
+        if not data:
+            return None
+
+        session = self._from_document(user_id, data)
+        self._sessions[user_id] = session
+        self._evict()
+        return session
+
+    async def pop(self, user_id: int) -> Optional[Session]:
+        """Remove and return a user's session if it hasn't expired"""
+        session = self._sessions.pop(user_id, None)
+        if session is not None and session.expires_at <= time.time():
+            session = None
+        if not self.persist:
+            return session
+
+        try:
+            if session is not None:
+                await bot_data.data["mongo"].button_store.delete_one({"_id": self._key(user_id)})
+                return session
+
+            # Started before a restart or on another process - take it atomically so it's used once
+            data = await bot_data.data["mongo"].button_store.find_one_and_delete({"_id": self._key(user_id)})
+        except Exception as e:
+            logger.error(f"Failed to pop session {self._key(user_id)}: {e}")
+            return session
+        if not data:
+            return None
+
+        session = self._from_document(user_id, data)
+        return session if session.expires_at > time.time() else None
+
+    def _from_document(self, user_id: int, data: dict) -> Session:
+        expires_at = data["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return Session(user_id, data.get("save", False), data.get("stored_data"), data.get("channel_id"), expires_at.timestamp())
+
+    def _key(self, user_id: int) -> str:
+        return f"session:{self.namespace}:{user_id}"
+
+    def _evict(self) -> None:
+        """Drop expired sessions from the old end, then the least recently used over max size"""
+        now = time.time()
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now and len(self._sessions) <= self.max_size:
+                break
+            del self._sessions[user_id]
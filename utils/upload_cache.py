@@ -0,0 +1,114 @@
+"""
+Upload Cache - Skips Cloudinary uploads of images that were already uploaded
+
+Images are keyed by the SHA-256 of their bytes (plus the target public_id, when
+one is given). Uploads from a URL can only be keyed by the URL, whose content may
+change, so callers pass a max_age to let those entries expire. The key -> upload result map lives in the upload_cache collection,
+with a small LRU in front of it so repeat uploads don't even hit Mongo.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from utils.mongo import MongoClient, ensure_utc_aware
+
+# Upload results kept in memory
+UPLOAD_CACHE_MAX_SIZE = 512
+
+logger = logging.getLogger(__name__)
+
+
+def upload_key(content_hash: str, folder: str, public_id: Optional[str]) -> str:
+    """Cache key for an upload - the same bytes under a different public_id are a different upload"""
+    if public_id:
+        return f"{content_hash}:{folder}/{public_id}"
+    return f"{content_hash}:{folder}"
+
+
+class UploadCache:
+    """Content hash -> Cloudinary upload result, in memory and in MongoDB"""
+
+    def __init__(self, mongo: MongoClient, max_size: int = UPLOAD_CACHE_MAX_SIZE):
+        self.mongo = mongo
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of cache counters"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def get(self, key: str, max_age: Optional[timedelta] = None) -> Optional[Dict[str, Any]]:
+        """The stored upload result for a key, or None if there is none or it's older than max_age"""
+        result = self._entries.get(key)
+        if result is None:
+            try:
+                data = await self.mongo.upload_cache.find_one(
+                    {"_id": key}, {"secure_url": 1, "public_id": 1, "uploaded_at": 1}
+                )
+            except Exception as e:
+                # Worst case we upload again
+                logger.error(f"Failed to read upload cache: {e}")
+                data = None
+            if data:
+                result = {
+                    "secure_url": data["secure_url"],
+                    "public_id": data.get("public_id"),
+                    "uploaded_at": ensure_utc_aware(data.get("uploaded_at")),
+                }
+                self._remember(key, result)
+        else:
+            self._entries.move_to_end(key)
+
+        if result is not None and max_age is not None:
+            uploaded_at = result.get("uploaded_at")
+            if uploaded_at is None or datetime.now(timezone.utc) - uploaded_at > max_age:
+                result = None
+
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"secure_url": result["secure_url"], "public_id": result["public_id"], "deduplicated": True}
+
+    async def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Record a finished upload, replacing entries for whatever it overwrote"""
+        if result.get("public_id"):
+            # A->B->A to the same public_id must not hand back A's old version
+            await self.forget_public_id(result["public_id"])
+        entry = {
+            "secure_url": result["secure_url"],
+            "public_id": result.get("public_id"),
+            "uploaded_at": datetime.now(timezone.utc),
+        }
+        self._remember(key, entry)
+        try:
+            await self.mongo.upload_cache.replace_one(
+                {"_id": key},
+                {"_id": key, **entry},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to write upload cache: {e}")
+
+    async def forget_public_id(self, public_id: str) -> None:
+        """Drop every entry pointing at an image that was deleted"""
+        for key in [key for key, entry in self._entries.items() if entry.get("public_id") == public_id]:
+            del self._entries[key]
+        try:
+            await self.mongo.upload_cache.delete_many({"public_id": public_id})
+        except Exception as e:
+            logger.error(f"Failed to clear upload cache for {public_id}: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
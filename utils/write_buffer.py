@@ -0,0 +1,117 @@
+"""
+Write Buffer - Write-behind batching for bookkeeping updates
+
+Updates that nothing waits on (last_posted, last message IDs, the info message
+document) are queued per collection and sent as one bulk_write per collection,
+either after a short interval or once enough have piled up. Call close() on
+shutdown so nothing queued is lost - writes added after that are sent straight
+away. The writes are independent, so a batch is unordered and one bad write
+doesn't stop the rest.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+from pymongo.errors import BulkWriteError
+
+from utils.mongo import MongoClient
+
+# Flush this long after the first queued write
+WRITE_FLUSH_SECONDS = 1.0
+# ...or as soon as this many writes are queued
+WRITE_MAX_BATCH = 100
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """Queues pymongo write operations and flushes them with bulk_write"""
+
+    def __init__(
+        self,
+        mongo: MongoClient,
+        flush_seconds: float = WRITE_FLUSH_SECONDS,
+        max_batch: int = WRITE_MAX_BATCH
+    ):
+        self.mongo = mongo
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        # Collection name -> queued operations, in the order they were added
+        self._pending: Dict[str, List] = {}
+        self._count = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._closed = False
+        # Totals for logging / metrics
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def __len__(self):
+        return self._count
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of queued writes and totals"""
+        return {
+            "pending": self._count,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    def add(self, collection: str, operation) -> None:
+        """Queue a write (UpdateOne, ReplaceOne, ...) on a collection of MongoClient"""
+        self._pending.setdefault(collection, []).append(operation)
+        self._count += 1
+
+        if self._closed or self._count >= self.max_batch:
+            # Closed - nothing will flush later, so write through
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Send everything queued so far"""
+        async with self._lock:
+            pending, self._pending, self._count = self._pending, {}, 0
+            for collection, operations in pending.items():
+                await self._write(collection, operations)
+
+    async def close(self) -> None:
+        """Stop the timer and flush whatever is left"""
+        self._closed = True
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_seconds)
+        finally:
+            self._timer = None
+        await self.flush()
+
+    async def _write(self, collection: str, operations: List) -> None:
+        # Unordered - the writes are independent bookkeeping, so one bad write mustn't drop the rest
+        try:
+            result = await getattr(self.mongo, collection).bulk_write(operations, ordered=False)
+            self.written += result.inserted_count + result.matched_count + result.upserted_count + result.deleted_count
+            self.batches += 1
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            self.written += (
+                e.details.get("nInserted", 0) + e.details.get("nMatched", 0)
+                + e.details.get("nUpserted", 0) + e.details.get("nRemoved", 0)
+            )
+            self.failed += len(errors)
+            logger.error(f"Bulk write to {collection} had {len(errors)} failed write(s): {errors[:1]}")
+        except Exception as e:
+            self.failed += len(operations)
+            logger.error(f"Bulk write of {len(operations)} operation(s) to {collection} failed: {e}")